@@ -0,0 +1,90 @@
+import threading
+
+from config import (
+    ADMIT_MAX_IN_FLIGHT,
+    ADMIT_MAX_QUEUE,
+    ADMIT_RETRY_AFTER_S,
+    DEGRADE_SKIP_EXPLAIN_AT,
+    DEGRADE_SKIP_USAGE_AT,
+)
+from scheduler import cpu_scheduler
+
+# Degradation ladder: level -> stages skipped at that level
+FULL = 0
+NO_EXPLANATIONS = 1
+SCORES_ONLY = 2
+
+SKIPPED_STAGES = {
+    FULL: [],
+    NO_EXPLANATIONS: ["explanation"],
+    SCORES_ONLY: ["explanation", "usage_clarity"],
+}
+
+
+class Overloaded(RuntimeError):
+    def __init__(self, reason: str, retry_after: int = ADMIT_RETRY_AFTER_S):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds in-flight requests and the CPU queue, and picks the degradation
+    level each request is served at.
+
+    A request is rejected (Overloaded) when ADMIT_MAX_IN_FLIGHT requests
+    are already in flight or ADMIT_MAX_QUEUE are waiting for a CPU slot.
+    Otherwise its level follows the load at admission: explanations are
+    skipped from DEGRADE_SKIP_EXPLAIN_AT, usage/clarity too from
+    DEGRADE_SKIP_USAGE_AT, while scores are always returned.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.rejected = 0
+        self.served = {level: 0 for level in SKIPPED_STAGES}
+        self._lock = threading.Lock()
+
+    def admit(self) -> int:
+        """Reserve an in-flight slot; returns the degradation level."""
+
+        queued = cpu_scheduler.queued()
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise Overloaded("too many requests in flight")
+            if queued >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("request queue is full")
+
+            load = self.in_flight / self.max_in_flight
+            if load >= DEGRADE_SKIP_USAGE_AT:
+                level = SCORES_ONLY
+            elif load >= DEGRADE_SKIP_EXPLAIN_AT:
+                level = NO_EXPLANATIONS
+            else:
+                level = FULL
+
+            self.in_flight += 1
+            self.served[level] += 1
+            return level
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "rejected": self.rejected,
+                "served_by_level": dict(self.served),
+            }
+
+
+admission = AdmissionController(ADMIT_MAX_IN_FLIGHT, ADMIT_MAX_QUEUE)
@@ -1,5 +1,7 @@
 # app/config.py
 
+import os
+
 # Grammar scoring thresholds
 GRAMMAR_BASE_SCORE_THRESHOLDS = {
     "4": 1,
@@ -18,3 +20,130 @@ SPELLING_THRESHOLDS = {
 
 # LLM behavior
 LLM_TEMPERATURE = 0
+
+# Sentence segmentation: "parser" (full pipeline), "senter" or "sentencizer"
+SEGMENT_MODE = os.getenv("SEGMENT_MODE", "parser")
+
+# Input hard limits (requests above these are rejected with HTTP 413)
+MAX_INPUT_CHARS = int(os.getenv("MAX_INPUT_CHARS", "400000"))
+MAX_INPUT_WORDS = int(os.getenv("MAX_INPUT_WORDS", "60000"))
+
+# Long-document mode: inputs above this size are analysed chunk by chunk
+LONG_DOC_THRESHOLD_CHARS = int(os.getenv("LONG_DOC_THRESHOLD_CHARS", "20000"))
+STREAM_CHUNK_CHARS = int(os.getenv("STREAM_CHUNK_CHARS", "5000"))
+LONG_DOC_MAX_EXPLANATION_ITEMS = int(os.getenv("LONG_DOC_MAX_EXPLANATION_ITEMS", "50"))
+LONG_DOC_MAX_USAGE_ISSUES = int(os.getenv("LONG_DOC_MAX_USAGE_ISSUES", "100"))
+
+# LLM backends: "auto" (vLLM if a GPU is present, else Groq), "vllm" or "groq"
+LLM_BACKEND = os.getenv("LLM_BACKEND", "auto")
+VLLM_BASE_URL = os.getenv("VLLM_BASE_URL", "http://localhost:8000/v1")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+# Explanation prompts: max estimated prompt tokens (system + user) per LLM call
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "1500"))
+
+# Explanation fan-out: items per LLM call, max parallel calls per request,
+# and retries for a chunk whose call or JSON parse fails
+LLM_EXPLAIN_CHUNK_ITEMS = int(os.getenv("LLM_EXPLAIN_CHUNK_ITEMS", "8"))
+LLM_EXPLAIN_CONCURRENCY = int(os.getenv("LLM_EXPLAIN_CONCURRENCY", "4"))
+LLM_EXPLAIN_RETRIES = int(os.getenv("LLM_EXPLAIN_RETRIES", "1"))
+
+# LLM routing: backends in preference order (empty = derived from LLM_BACKEND),
+# EWMA smoothing, health-check interval, and hedged requests
+LLM_BACKENDS = [b.strip() for b in os.getenv("LLM_BACKENDS", "").split(",") if b.strip()]
+LLM_EWMA_ALPHA = float(os.getenv("LLM_EWMA_ALPHA", "0.2"))
+LLM_HEALTH_INTERVAL_S = float(os.getenv("LLM_HEALTH_INTERVAL_S", "15"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+# Client-side rate limiting for hosted LLM backends (0 disables a bucket).
+# Waiters beyond LLM_RATE_MAX_QUEUE, or waiting past LLM_RATE_MAX_WAIT_S, fail fast.
+GROQ_RPM = int(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("GROQ_TPM", "6000"))
+LLM_RATE_MAX_QUEUE = int(os.getenv("LLM_RATE_MAX_QUEUE", "100"))
+LLM_RATE_MAX_WAIT_S = float(os.getenv("LLM_RATE_MAX_WAIT_S", "30"))
+LLM_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "300"))
+
+# Priority scheduling: concurrent pipeline (CPU) and LLM slots shared by all
+# requests, and weighted-fair-queueing weights per priority class
+SCHED_CPU_SLOTS = int(os.getenv("SCHED_CPU_SLOTS", str(os.cpu_count() or 1)))
+SCHED_LLM_SLOTS = int(os.getenv("SCHED_LLM_SLOTS", "8"))
+SCHED_WEIGHTS = {
+    name.strip(): float(weight)
+    for name, weight in (
+        pair.split("=")
+        for pair in os.getenv("SCHED_WEIGHTS", "interactive=8,bulk=1").split(",")
+    )
+}
+
+# Admission control: 503 + Retry-After above these limits
+ADMIT_MAX_IN_FLIGHT = int(os.getenv("ADMIT_MAX_IN_FLIGHT", "64"))
+ADMIT_MAX_QUEUE = int(os.getenv("ADMIT_MAX_QUEUE", "32"))
+ADMIT_RETRY_AFTER_S = int(os.getenv("ADMIT_RETRY_AFTER_S", "2"))
+
+# Degradation ladder: load (fraction of ADMIT_MAX_IN_FLIGHT in use) at which
+# LLM explanations, then usage/clarity analysis, are skipped
+DEGRADE_SKIP_EXPLAIN_AT = float(os.getenv("DEGRADE_SKIP_EXPLAIN_AT", "0.6"))
+DEGRADE_SKIP_USAGE_AT = float(os.getenv("DEGRADE_SKIP_USAGE_AT", "0.85"))
+
+# Cascade evaluation: screen each sentence with cheap tagger-only checks and
+# run the dependency-based rules only on sentences flagged as suspicious
+CASCADE_MODE = os.getenv("CASCADE_MODE", "0") == "1"
+
+# Sentences parsed together (nlp.pipe) and aggregated in one NumPy pass
+ANALYZE_BATCH_SIZE = int(os.getenv("ANALYZE_BATCH_SIZE", "32"))
+
+# Shadow mode: fraction of /evaluate traffic re-run in the background with an
+# alternative pipeline configuration and compared against the live result
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0"))
+SHADOW_SEGMENT_MODE = os.getenv("SHADOW_SEGMENT_MODE", SEGMENT_MODE)
+SHADOW_CASCADE = os.getenv("SHADOW_CASCADE", "1" if CASCADE_MODE else "0") == "1"
+SHADOW_MAX_BACKLOG = int(os.getenv("SHADOW_MAX_BACKLOG", "16"))
+
+# Memory growth control: the spaCy StringStore grows with every unseen token
+MEM_CHECK_EVERY = int(os.getenv("MEM_CHECK_EVERY", "200"))
+MEM_MAX_STRINGS = int(os.getenv("MEM_MAX_STRINGS", "300000"))
+# Worker recycling (0 = off); only useful under a supervisor that restarts
+# workers, e.g. gunicorn with uvicorn workers
+MEM_RECYCLE_REQUESTS = int(os.getenv("MEM_RECYCLE_REQUESTS", "0"))
+MEM_RECYCLE_RSS_MB = int(os.getenv("MEM_RECYCLE_RSS_MB", "0"))
+
+# Process-wide LRU of spelling verdicts (distinct lowercase words)
+SPELL_CACHE_SIZE = int(os.getenv("SPELL_CACHE_SIZE", "100000"))
+
+# Source passages pre-analysed at startup (JSON: {prompt_id: passage})
+PASSAGES_PATH = os.getenv("PASSAGES_PATH") or None
+
+# Explanation retrieval: reuse stored explanations of near-duplicate spans
+EXPLAIN_INDEX = os.getenv("EXPLAIN_INDEX", "0") == "1"
+EXPLAIN_INDEX_THRESHOLD = float(os.getenv("EXPLAIN_INDEX_THRESHOLD", "0.9"))
+# Per-type overrides, e.g. "article_error=0.8,run_on=0.97"
+EXPLAIN_INDEX_THRESHOLDS = {
+    name.strip(): float(value)
+    for name, value in (
+        pair.split("=")
+        for pair in os.getenv("EXPLAIN_INDEX_THRESHOLDS", "").split(",")
+        if pair.strip()
+    )
+}
+# 0 stores nothing (every lookup misses)
+EXPLAIN_INDEX_MAX_PER_TYPE = int(os.getenv("EXPLAIN_INDEX_MAX_PER_TYPE", "1000"))
+
+# Per-request deadlines (deadline_ms): optional stages need at least this
+# much budget left to start
+DEADLINE_USAGE_MIN_MS = int(os.getenv("DEADLINE_USAGE_MIN_MS", "100"))
+DEADLINE_EXPLAIN_MIN_MS = int(os.getenv("DEADLINE_EXPLAIN_MIN_MS", "300"))
+
+# spaCy model-instance pool: each request checks out one of NLP_POOL_SIZE
+# full pipelines (1 = one shared instance). With NLP_PARSE_THREADS > 1,
+# parsing is instead sharded over that many threads, one pooled instance each
+NLP_POOL_SIZE = int(os.getenv("NLP_POOL_SIZE", "1"))
+NLP_PARSE_THREADS = int(os.getenv("NLP_PARSE_THREADS", "0"))
+
+# Sampling profiler (0 = off); folded stacks kept for PROFILER_WINDOW_S
+# in PROFILER_BUCKET_S buckets
+PROFILER_HZ = float(os.getenv("PROFILER_HZ", "0"))
+PROFILER_WINDOW_S = int(os.getenv("PROFILER_WINDOW_S", "600"))
+PROFILER_BUCKET_S = int(os.getenv("PROFILER_BUCKET_S", "10"))
+PROFILER_MAX_DEPTH = int(os.getenv("PROFILER_MAX_DEPTH", "64"))
@@ -0,0 +1,37 @@
+import time
+
+
+class Deadline:
+    """
+    Latency budget of one request, started when the request arrives.
+    Passed down the stages; LLM calls get `remaining()` as their timeout.
+    """
+
+    def __init__(self, budget_ms: int):
+        self.budget_ms = budget_ms
+        self.started = time.monotonic()
+        self.expires = self.started + budget_ms / 1000
+        self.cut = []
+
+    def remaining(self) -> float:
+        """Seconds left (never negative)."""
+        return max(0.0, self.expires - time.monotonic())
+
+    def remaining_ms(self) -> float:
+        return self.remaining() * 1000
+
+    def allows(self, min_ms: float) -> bool:
+        return self.remaining_ms() >= min_ms
+
+    def skip(self, part: str) -> None:
+        """Record a part of the response cut off by the deadline."""
+        if part not in self.cut:
+            self.cut.append(part)
+
+    def report(self) -> dict:
+        return {
+            "budget_ms": self.budget_ms,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 1),
+            "remaining_ms": round(self.remaining_ms(), 1),
+            "cut": self.cut,
+        }
@@ -1,28 +1,143 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI, RateLimitError
 import os
+import time
+from typing import AsyncIterator
 from dotenv import load_dotenv
 
+from config import (
+    GROQ_BASE_URL,
+    GROQ_RPM,
+    GROQ_TPM,
+    LLM_COMPLETION_TOKEN_ESTIMATE,
+    LLM_RATE_MAX_WAIT_S,
+)
+from llm.rate_limit import get_limiter
+from utils.text import estimate_tokens
+
 load_dotenv()  # <-- REQUIRED here
 
+
+def _queue_timeout(timeout: float | None) -> float | None:
+    # A caller's deadline also caps the wait for the rate limiter
+    return None if timeout is None else min(LLM_RATE_MAX_WAIT_S, timeout)
+
 class OllamaClient:
     def __init__(self):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY is not set")
 
+        # Retries are left to the callers: SDK-level 429 retries would
+        # bypass the shared rate limiter and feed a 429 storm.
         self.client = OpenAI(
-            base_url="https://api.groq.com/openai/v1",
+            base_url=GROQ_BASE_URL,
+            api_key=api_key,
+            max_retries=0,
+        )
+        self.aclient = AsyncOpenAI(
+            base_url=GROQ_BASE_URL,
             api_key=api_key,
+            max_retries=0,
         )
+        self.limiter = get_limiter("groq", GROQ_RPM, GROQ_TPM)
 
 
-    def chat(self, system_prompt: str, user_prompt: str) -> str:
-        resp = self.client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            temperature=0,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+    def _estimate(self, system_prompt: str, user_prompt: str) -> int:
+        return (
+            estimate_tokens(system_prompt)
+            + estimate_tokens(user_prompt)
+            + LLM_COMPLETION_TOKEN_ESTIMATE
         )
-        return resp.choices[0].message.content.strip()
+
+    def complete(
+        self, system_prompt: str, user_prompt: str, timeout: float | None = None
+    ) -> tuple[str, dict]:
+        estimated = self._estimate(system_prompt, user_prompt)
+        started = time.monotonic()
+        self.limiter.acquire(estimated, _queue_timeout(timeout))
+
+        client = self.client
+        if timeout is not None:
+            # Time spent queueing for the rate limit comes out of the budget
+            client = client.with_options(timeout=max(0.001, timeout - (time.monotonic() - started)))
+
+        try:
+            raw = client.chat.completions.with_raw_response.create(
+                model="llama-3.1-8b-instant",
+                temperature=0,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+            )
+        except RateLimitError as e:
+            self.limiter.update_from_headers(e.response.headers)
+            raise
+
+        self.limiter.update_from_headers(raw.headers)
+        resp = raw.parse()
+
+        usage = {
+            "prompt_tokens": resp.usage.prompt_tokens if resp.usage else 0,
+            "completion_tokens": resp.usage.completion_tokens if resp.usage else 0,
+        }
+        self.limiter.settle(estimated, usage["prompt_tokens"] + usage["completion_tokens"])
+        return resp.choices[0].message.content.strip(), usage
+
+    def chat(self, system_prompt: str, user_prompt: str) -> str:
+        return self.complete(system_prompt, user_prompt)[0]
+
+    def health(self) -> bool:
+        self.client.with_options(timeout=5, max_retries=0).models.list()
+        return True
+
+    async def astream(
+        self, system_prompt: str, user_prompt: str, timeout: float | None = None
+    ) -> AsyncIterator[str]:
+        started = time.monotonic()
+        estimated = self._estimate(system_prompt, user_prompt)
+        await self.limiter.acquire_async(estimated, _queue_timeout(timeout))
+
+        aclient = self.aclient
+        if timeout is not None:
+            aclient = aclient.with_options(timeout=max(0.001, timeout - (time.monotonic() - started)))
+
+        try:
+            raw = await aclient.chat.completions.with_raw_response.create(
+                model="llama-3.1-8b-instant",
+                temperature=0,
+                stream=True,
+                stream_options={"include_usage": True},
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+            )
+        except RateLimitError as e:
+            self.limiter.update_from_headers(e.response.headers)
+            raise
+
+        self.limiter.update_from_headers(raw.headers)
+        stream = raw.parse()
+
+        # Settle the reservation like complete(): from the final usage chunk,
+        # else (no usage chunk, stream cut short) from the text received
+        usage = None
+        output = []
+        try:
+            async for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    output.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        finally:
+            if usage is not None:
+                actual = usage.prompt_tokens + usage.completion_tokens
+            else:
+                actual = (
+                    estimate_tokens(system_prompt)
+                    + estimate_tokens(user_prompt)
+                    + estimate_tokens("".join(output))
+                )
+            self.limiter.settle(estimated, actual)
@@ -0,0 +1,255 @@
+# app/llm/rate_limit.py
+
+import asyncio
+import collections
+import itertools
+import re
+import threading
+import time
+
+from config import LLM_RATE_MAX_QUEUE, LLM_RATE_MAX_WAIT_S
+
+
+class RateLimitQueueFull(RuntimeError):
+    pass
+
+
+class RateLimitTimeout(RuntimeError):
+    pass
+
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|h|m|s)")
+
+
+def _parse_duration(value: str) -> float | None:
+    """
+    "7.66s", "2m59.56s", "1h2m", "250ms" or plain seconds -> seconds.
+    """
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+
+    parts = _DURATION_PART.findall(value or "")
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(n) * scale[u] for n, u in parts)
+
+
+class _Bucket:
+    """Token bucket refilled continuously at `per_minute` / 60 per second."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    def refill(self, now: float) -> None:
+        self.level = min(
+            self.capacity,
+            self.level + (now - self.updated) * self.capacity / 60,
+        )
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        if not self.enabled or self.level >= min(amount, self.capacity):
+            return 0.0
+        return (min(amount, self.capacity) - self.level) * 60 / self.capacity
+
+
+class RateLimiter:
+    """
+    Shared RPM + TPM token-bucket limiter for one hosted provider.
+
+    Callers (threads via acquire(), async tasks via acquire_async()) wait
+    in one FIFO queue of at most `max_queue` entries; a caller that cannot
+    be served before its deadline gets RateLimitTimeout, one arriving at a
+    full queue gets RateLimitQueueFull. Provider headers (Retry-After,
+    x-ratelimit-*) pause or tighten the buckets via update_from_headers().
+    """
+
+    def __init__(self, rpm: int, tpm: int, max_queue: int = LLM_RATE_MAX_QUEUE):
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.max_queue = max_queue
+        self.blocked_until = 0.0
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._queue = collections.deque()
+        self._tickets = itertools.count()
+
+    # ---------------------------------------------
+    # Queue / bucket core (call with _lock held)
+    # ---------------------------------------------
+
+    def _enqueue(self) -> int:
+        if len(self._queue) >= self.max_queue:
+            raise RateLimitQueueFull(
+                f"LLM rate-limit queue is full ({self.max_queue} waiting)"
+            )
+        ticket = next(self._tickets)
+        self._queue.append(ticket)
+        return ticket
+
+    def _leave(self, ticket: int) -> None:
+        try:
+            self._queue.remove(ticket)
+        except ValueError:
+            pass
+        self._cond.notify_all()
+
+    def _try_take(self, ticket: int, tokens: int) -> float:
+        """
+        Take one request + `tokens` if `ticket` is first in line and both
+        buckets allow it. Returns 0 on success, else seconds to wait.
+        """
+
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self._queue[0] != ticket:
+            return 0.05
+
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        wait = max(self.requests.wait_for(1), self.tokens.wait_for(tokens))
+        if wait > 0:
+            return wait
+
+        if self.requests.enabled:
+            self.requests.level -= 1
+        if self.tokens.enabled:
+            self.tokens.level -= tokens
+        self._queue.popleft()
+        self._cond.notify_all()
+        return 0.0
+
+    # ---------------------------------------------
+    # Public API
+    # ---------------------------------------------
+
+    def acquire(self, tokens: int, timeout: float | None = None) -> None:
+        """Block the calling thread until the request may be sent."""
+
+        deadline = time.monotonic() + (LLM_RATE_MAX_WAIT_S if timeout is None else timeout)
+        with self._cond:
+            ticket = self._enqueue()
+            try:
+                while True:
+                    wait = self._try_take(ticket, tokens)
+                    if wait == 0:
+                        return
+                    remaining = deadline - time.monotonic()
+                    if wait > remaining:
+                        raise RateLimitTimeout(
+                            f"LLM rate limit: no capacity within {remaining:.1f}s"
+                        )
+                    self._cond.wait(wait)
+            except BaseException:
+                self._leave(ticket)
+                raise
+
+    async def acquire_async(self, tokens: int, timeout: float | None = None) -> None:
+        """Same as acquire() without blocking the event loop."""
+
+        deadline = time.monotonic() + (LLM_RATE_MAX_WAIT_S if timeout is None else timeout)
+        with self._lock:
+            ticket = self._enqueue()
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_take(ticket, tokens)
+                if wait == 0:
+                    return
+                remaining = deadline - time.monotonic()
+                if wait > remaining:
+                    raise RateLimitTimeout(
+                        f"LLM rate limit: no capacity within {remaining:.1f}s"
+                    )
+                await asyncio.sleep(min(wait, 0.25))
+        except BaseException:
+            with self._lock:
+                self._leave(ticket)
+            raise
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage is known."""
+
+        if actual <= 0 or not self.tokens.enabled:
+            return
+        with self._lock:
+            self.tokens.level -= actual - estimated
+
+    def update_from_headers(self, headers) -> None:
+        """
+        Adjust to the provider's view of our quota:
+        - Retry-After: pause everyone for that long
+        - x-ratelimit-limit-tokens: TPM capacity
+        - x-ratelimit-remaining-{tokens,requests}: clamp the buckets, and
+          pause until x-ratelimit-reset-* when a quota is exhausted
+        """
+
+        if not headers:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            retry_after = _parse_duration(headers.get("retry-after"))
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+            limit_tokens = headers.get("x-ratelimit-limit-tokens")
+            if limit_tokens and limit_tokens.isdigit() and self.tokens.enabled:
+                self.tokens.refill(now)
+                self.tokens.capacity = float(limit_tokens)
+
+            for kind, bucket in (("tokens", self.tokens), ("requests", self.requests)):
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if not remaining or not remaining.isdigit():
+                    continue
+                if bucket.enabled:
+                    bucket.refill(now)
+                    bucket.level = min(bucket.level, float(remaining))
+                if int(remaining) == 0:
+                    reset = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset:
+                        self.blocked_until = max(self.blocked_until, now + reset)
+
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                "rpm": self.requests.capacity,
+                "tpm": self.tokens.capacity,
+                "requests_available": self.requests.level,
+                "tokens_available": self.tokens.level,
+                "queued": len(self._queue),
+                "blocked_for_s": max(0.0, self.blocked_until - now),
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, rpm: int, tpm: int) -> RateLimiter:
+    """
+    Process-wide limiter per provider, shared by every client instance.
+    """
+
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(rpm, tpm)
+        return _limiters[name]
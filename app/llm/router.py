@@ -1,9 +1,30 @@
 # app/llm/router.py
 
+import collections
 import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import AsyncIterator
+from config import (
+    LLM_BACKEND,
+    LLM_BACKENDS,
+    LLM_EWMA_ALPHA,
+    LLM_HEALTH_INTERVAL_S,
+    LLM_HEDGE,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_PERCENTILE,
+)
 from llm.vllm_client import VLLMClient
 from llm.ollama_client import OllamaClient
 
+# Backend name -> client class. Every client implements
+# complete / chat / astream / health.
+BACKENDS = {
+    "vllm": VLLMClient,
+    "groq": OllamaClient,
+}
+
 
 def gpu_available() -> bool:
     try:
@@ -18,12 +39,229 @@ def gpu_available() -> bool:
         return False
 
 
+def _configured_backends() -> list[str]:
+    if LLM_BACKENDS:
+        return LLM_BACKENDS
+    if LLM_BACKEND == "vllm":
+        return ["vllm"]
+    if LLM_BACKEND == "groq":
+        return ["groq"]
+    return ["vllm", "groq"] if gpu_available() else ["groq"]
+
+
+class BackendStats:
+    """
+    Per-backend EWMA latency / error rate, a window of recent latencies
+    (for the hedging percentile) and the last health-check verdict.
+    """
+
+    WINDOW = 200
+
+    def __init__(self):
+        self.ewma_latency = None
+        self.ewma_error = 0.0
+        self.healthy = True
+        self.calls = 0
+        self.errors = 0
+        self._recent = collections.deque(maxlen=self.WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self.ewma_error += LLM_EWMA_ALPHA * ((0.0 if ok else 1.0) - self.ewma_error)
+            if ok:
+                self._recent.append(latency)
+                if self.ewma_latency is None:
+                    self.ewma_latency = latency
+                else:
+                    self.ewma_latency += LLM_EWMA_ALPHA * (latency - self.ewma_latency)
+            else:
+                self.errors += 1
+
+    def percentile(self, p: float) -> float | None:
+        with self._lock:
+            if len(self._recent) < LLM_HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._recent)
+        k = min(len(ordered) - 1, int(len(ordered) * p / 100))
+        return ordered[k]
+
+    def score(self) -> float:
+        """
+        Lower is better. Untried backends score 0 (explored first); a
+        backend that has only ever failed ranks last, since fast failures
+        (e.g. connection refused) would otherwise look like low latency.
+        """
+        if self.ewma_latency is None:
+            return float("inf") if self.errors else 0.0
+        return self.ewma_latency * (1 + 10 * self.ewma_error)
+
+    def snapshot(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "ewma_latency_ms": None if self.ewma_latency is None else self.ewma_latency * 1000,
+            "ewma_error_rate": self.ewma_error,
+            "calls": self.calls,
+            "errors": self.errors,
+        }
+
+
 class LLMRouter:
+    """
+    Routes each call to the best backend at that moment.
+
+    Backends are ranked by EWMA latency penalised by EWMA error rate;
+    backends failing the periodic health check are skipped while any
+    healthy one remains. A failed call falls over to the next backend.
+    With LLM_HEDGE=1, a call still running after the primary backend's
+    LLM_HEDGE_PERCENTILE latency is duplicated on the runner-up, and the
+    first successful answer wins.
+    """
+
     def __init__(self):
-        if gpu_available():
-            self.client = VLLMClient()
-        else:
-            self.client = OllamaClient()
+        self.clients = {}
+        self.stats = {}
+
+        for name in _configured_backends():
+            try:
+                self.clients[name] = BACKENDS[name]()
+                self.stats[name] = BackendStats()
+            except Exception:
+                # e.g. Groq without OPENAI_API_KEY: backend unavailable
+                continue
+
+        if not self.clients:
+            raise RuntimeError(f"No LLM backend available from {_configured_backends()}")
+
+        self._pool = ThreadPoolExecutor(thread_name_prefix="llm")
+
+        if LLM_HEALTH_INTERVAL_S > 0 and len(self.clients) > 1:
+            threading.Thread(target=self._health_loop, daemon=True).start()
+
+    @property
+    def client(self):
+        """Best backend client right now."""
+        return self.clients[self._ranked()[0]]
+
+    def _ranked(self) -> list[str]:
+        names = list(self.clients)
+        healthy = [n for n in names if self.stats[n].healthy] or names
+        return sorted(healthy, key=lambda n: self.stats[n].score())
+
+    def _health_loop(self) -> None:
+        while True:
+            time.sleep(LLM_HEALTH_INTERVAL_S)
+            for name, client in self.clients.items():
+                try:
+                    self.stats[name].healthy = bool(client.health())
+                except Exception:
+                    self.stats[name].healthy = False
+
+    def _timed(
+        self, name: str, system_prompt: str, user_prompt: str, timeout: float | None = None
+    ) -> tuple[str, dict]:
+        t0 = time.monotonic()
+        try:
+            result = self.clients[name].complete(system_prompt, user_prompt, timeout=timeout)
+        except Exception:
+            self.stats[name].record(time.monotonic() - t0, ok=False)
+            raise
+        self.stats[name].record(time.monotonic() - t0, ok=True)
+        return result
+
+    def complete(
+        self, system_prompt: str, user_prompt: str, timeout: float | None = None
+    ) -> tuple[str, dict]:
+        """
+        `timeout` (seconds) bounds the whole call, failover and hedging
+        included; every backend attempt gets the time still left.
+        """
+
+        ranked = self._ranked()
+        expires = None if timeout is None else time.monotonic() + timeout
+
+        def left() -> float | None:
+            if expires is None:
+                return None
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("LLM call deadline exceeded")
+            return remaining
+
+        if not LLM_HEDGE or len(ranked) < 2:
+            last_exc = None
+            for name in ranked:
+                attempt_timeout = left()
+                try:
+                    return self._timed(name, system_prompt, user_prompt, attempt_timeout)
+                except Exception as e:
+                    last_exc = e
+            raise last_exc
+
+        primary, backup = ranked[0], ranked[1]
+        futures = [self._pool.submit(self._timed, primary, system_prompt, user_prompt, left())]
+
+        hedge_after = self.stats[primary].percentile(LLM_HEDGE_PERCENTILE)
+        if expires is not None:
+            hedge_after = min(hedge_after, left()) if hedge_after is not None else left()
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done or futures[0].exception() is not None:
+            futures.append(self._pool.submit(self._timed, backup, system_prompt, user_prompt, left()))
+
+        pending = set(futures)
+        last_exc = None
+        while pending:
+            done, pending = wait(pending, timeout=left(), return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError("LLM call deadline exceeded")
+            for f in done:
+                if f.exception() is None:
+                    return f.result()
+                last_exc = f.exception()
+        raise last_exc
 
     def chat(self, system_prompt: str, user_prompt: str) -> str:
-        return self.client.chat(system_prompt, user_prompt)
+        return self.complete(system_prompt, user_prompt)[0]
+
+    async def astream(
+        self, system_prompt: str, user_prompt: str, timeout: float | None = None
+    ) -> AsyncIterator[str]:
+        """
+        Streams from the best backend; falls over to the next one only if
+        a backend fails before producing any output. `timeout` is passed
+        to the client (the caller bounds the whole stream).
+        """
+
+        last_exc = None
+        expires = None if timeout is None else time.monotonic() + timeout
+        for name in self._ranked():
+            t0 = time.monotonic()
+            started = False
+            left = None if expires is None else expires - t0
+            if left is not None and left <= 0:
+                raise TimeoutError("LLM call deadline exceeded")
+            try:
+                async for delta in self.clients[name].astream(system_prompt, user_prompt, left):
+                    started = True
+                    yield delta
+            except Exception as e:
+                self.stats[name].record(time.monotonic() - t0, ok=False)
+                if started:
+                    raise
+                last_exc = e
+                continue
+            self.stats[name].record(time.monotonic() - t0, ok=True)
+            return
+        raise last_exc
+
+    def snapshot(self) -> dict:
+        return {
+            "ranking": self._ranked(),
+            "backends": {n: s.snapshot() for n, s in self.stats.items()},
+            "rate_limits": {
+                n: c.limiter.snapshot()
+                for n, c in self.clients.items()
+                if hasattr(c, "limiter")
+            },
+        }
@@ -1,23 +1,69 @@
 # app/llm/vllm_client.py
 
-from openai import OpenAI
+from typing import AsyncIterator
+
+from openai import AsyncOpenAI, OpenAI
+
+from config import VLLM_BASE_URL
 
 
 class VLLMClient:
     def __init__(self):
         self.client = OpenAI(
-            base_url="http://localhost:8000/v1",
+            base_url=VLLM_BASE_URL,
+            api_key="EMPTY",
+        )
+        self.aclient = AsyncOpenAI(
+            base_url=VLLM_BASE_URL,
             api_key="EMPTY",
         )
 
+    def complete(
+        self, system_prompt: str, user_prompt: str, timeout: float | None = None
+    ) -> tuple[str, dict]:
+        client = self.client
+        if timeout is not None:
+            # SDK retries would overrun the caller's deadline
+            client = client.with_options(timeout=timeout, max_retries=0)
+        resp = client.chat.completions.create(
+            model="meta-llama/Meta-Llama-3.1-8B-Instruct",
+            temperature=0,
+            top_p=1,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+        )
+        usage = {
+            "prompt_tokens": resp.usage.prompt_tokens if resp.usage else 0,
+            "completion_tokens": resp.usage.completion_tokens if resp.usage else 0,
+        }
+        return resp.choices[0].message.content.strip(), usage
+
     def chat(self, system_prompt: str, user_prompt: str) -> str:
-        resp = self.client.chat.completions.create(
+        return self.complete(system_prompt, user_prompt)[0]
+
+    def health(self) -> bool:
+        self.client.with_options(timeout=5, max_retries=0).models.list()
+        return True
+
+
+    async def astream(
+        self, system_prompt: str, user_prompt: str, timeout: float | None = None
+    ) -> AsyncIterator[str]:
+        aclient = self.aclient
+        if timeout is not None:
+            aclient = aclient.with_options(timeout=timeout, max_retries=0)
+        stream = await aclient.chat.completions.create(
             model="meta-llama/Meta-Llama-3.1-8B-Instruct",
             temperature=0,
             top_p=1,
+            stream=True,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
         )
-        return resp.choices[0].message.content.strip()
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
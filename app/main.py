@@ -1,120 +1,616 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
+import json
+import re
+import time
+from typing import AsyncIterator
 
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+
+from app.config import (
+    DEADLINE_EXPLAIN_MIN_MS,
+    DEADLINE_USAGE_MIN_MS,
+    LONG_DOC_THRESHOLD_CHARS,
+    MAX_INPUT_CHARS,
+    MAX_INPUT_WORDS,
+)
 from app.pipeline.normalize import normalize_text
 from app.pipeline.segment import segment_sentences
-from app.pipeline.grammar_rules import analyze_grammar_rules
-from app.pipeline.grammar_spacy import refine_with_spacy
-from app.pipeline.grammar_llm import explain_grammar_errors
+from app.pipeline.analyze import (
+    analyze_long_document,
+    explanation_items,
+    iter_analyzed,
+)
+from app.pipeline.grammar_llm import (
+    astream_grammar_explanations,
+    explain_grammar_errors,
+    llm_stats,
+)
 from app.pipeline.grammar_score import score_grammar
+from app.pipeline.passages import passages
+from app.pipeline.projection import (
+    STAGES,
+    parse_fields,
+    project,
+    required_stages,
+)
 from app.pipeline.spelling import evaluate_spelling
-from app.pipeline.usage_clarity import analyze_usage_clarity
 from dotenv import load_dotenv
 
+# Same module instances as the pipeline's (which imports `scheduler`),
+# so the priority context, slots and queue depth are shared.
+from admission import SKIPPED_STAGES, Overloaded, admission
+from deadline import Deadline
+from memory import memory_guard
+from profiler import profiler
+from nlp import request_scope
+from shadow import shadow
+from scheduler import (
+    BULK,
+    cpu_scheduler,
+    current_priority,
+    llm_scheduler,
+    resolve_priority,
+)
+
 load_dotenv()
 
 app = FastAPI(title="PTE Grammar & Spelling Evaluator")
 
+# No-op unless PROFILER_HZ > 0
+profiler.start()
+
+# Registers PASSAGES_PATH, if set, before the first request
+passages.load()
+
 
 class EvaluateRequest(BaseModel):
     summary: str
+    prompt_id: str | None = None
+    # Latency budget; optional stages are cut to meet it
+    deadline_ms: int | None = Field(default=None, gt=0)
 
 
-@app.post("/evaluate")
-def evaluate(payload: EvaluateRequest):
+class PassageRequest(BaseModel):
+    prompt_id: str
+    passage: str
+
+
+def _check_input_limits(summary: str) -> None:
+    """
+    Reject oversized input with HTTP 413 before any NLP work is done.
+    Words are counted lazily so the check itself allocates nothing large.
+    """
+
+    if len(summary) > MAX_INPUT_CHARS:
+        raise HTTPException(
+            status_code=413,
+            detail={
+                "error": "input_too_large",
+                "message": f"Input exceeds {MAX_INPUT_CHARS} characters.",
+                "limit": MAX_INPUT_CHARS,
+                "actual": len(summary),
+            },
+        )
+
+    words = 0
+    for _ in re.finditer(r"\S+", summary):
+        words += 1
+        if words > MAX_INPUT_WORDS:
+            raise HTTPException(
+                status_code=413,
+                detail={
+                    "error": "input_too_large",
+                    "message": f"Input exceeds {MAX_INPUT_WORDS} words.",
+                    "limit": MAX_INPUT_WORDS,
+                },
+            )
+
+
+def _analyze_long_document(
+    summary: str,
+    usage: bool,
+    stages: set[str],
+    passage=None,
+    deadline: Deadline | None = None,
+) -> tuple[dict, dict]:
+    """
+    Long-document mode: chunked, streaming analysis with bounded memory.
+    Per-sentence details are omitted from the response. Projected
+    `stages`, the passage and the deadline apply as in _analyze.
+    """
+
+    result = analyze_long_document(summary, usage, stages, passage, deadline)
+
+    grammar = "grammar_rules" in stages
+    usage = usage and "usage_clarity" in stages
+    executed = ["normalize"]
+    if grammar or usage:
+        executed.append("segment")
+    if grammar:
+        executed.append("grammar_rules")
+    if usage:
+        executed.append("usage_clarity")
+
+    response = {}
+    if "grammar_score" in stages:
+        response["grammar"] = {"score": result["grammar_score"]}
+        executed.append("grammar_score")
+    if grammar:
+        response.setdefault("grammar", {})["details"] = []
+    if usage:
+        response["usage_clarity"] = {
+            "issues": result["usage_issues"]
+        }
+    if "spelling" in stages:
+        response["spelling"] = result["spelling"]
+        executed.append("spelling")
+    response["long_document"] = {
+        "sentence_count": result["sentence_count"],
+        "severity_counts": result["severity_counts"],
+    }
+    response["stages"] = executed
+
+    explain_input = {
+        "summary": "",
+        "detected_errors": {
+            "_items": result["explanation_items"],
+            "_sentences": result["explanation_sentences"],
+        },
+    }
+
+    return response, explain_input
+
+
+def _analyze(
+    summary: str,
+    usage: bool = True,
+    prompt_id: str | None = None,
+    stages: set[str] | None = None,
+    deadline: Deadline | None = None,
+) -> tuple[dict, dict]:
+    """
+    Everything except the LLM explanation (STEP 5).
+    Returns (response without grammar.explanation, explanation input).
+    Usage/clarity is skipped when `usage` is False.
+
+    Only `stages` (see projection.required_stages; default all) run, and
+    the response only holds what they produce; response["stages"] lists
+    the stages executed.
+
+    With the `prompt_id` of a registered passage, sentences identical to
+    a passage sentence reuse its precomputed analysis (segmentation is
+    unchanged).
+
+    With a `deadline`, usage/clarity is skipped (and recorded as cut) when
+    less than DEADLINE_USAGE_MIN_MS is left.
+    """
+
+    stages = set(STAGES) if stages is None else stages
+    if (
+        usage
+        and deadline is not None
+        and "usage_clarity" in stages
+        and not deadline.allows(DEADLINE_USAGE_MIN_MS)
+    ):
+        usage = False
+        deadline.skip("usage_clarity")
+    if not usage:
+        stages = stages - {"usage_clarity"}
+
+    passage = passages.get(prompt_id) if prompt_id else None
+    if len(summary) > LONG_DOC_THRESHOLD_CHARS:
+        return _analyze_long_document(summary, usage, stages, passage, deadline)
+
+    executed = []
+    response = {}
+
     # STEP 1: normalize
-    normalized = normalize_text(payload.summary)
+    normalized = normalize_text(summary)
+    executed.append("normalize")
 
     # STEP 2: segment
-    sentences = segment_sentences(normalized)
+    sentences = []
+    if "segment" in stages:
+        sentences = segment_sentences(normalized)
+        executed.append("segment")
 
     # STEP 3 + 4: grammar detection (sentence-level)
+    grammar = "grammar_rules" in stages
+    usage = "usage_clarity" in stages
     sentence_results = []
-    sentence_error_packets = []  # <-- NEW: keep sentence + its errors
+    explanation_input = []
+    error_sentences = []
     usage_issues = []
 
-    for s in sentences:
-        text = s["text"]
-
-        errors = analyze_grammar_rules(text)
-        errors = refine_with_spacy(text, errors)
+    if grammar or usage:
+        for text, errors, issues in iter_analyzed(sentences, usage, passage, grammar):
+            sentence_results.append(errors)
 
-        sentence_results.append(errors)
+            # Preserve sentence-level error context for LLM
+            items = explanation_items(text, errors) if grammar else []
+            if items:
+                explanation_input.extend(items)
+                error_sentences.append(text)
 
-        # Preserve sentence-level error context for LLM
-        sentence_error_packets.append({
-            "text": text,
-            "errors": errors
-        })
+            # USAGE / CLARITY (parallel, non-grammar)
+            usage_issues.extend(issues)
 
-        # USAGE / CLARITY (parallel, non-grammar)
-        usage = analyze_usage_clarity(text)
-        if usage.get("issues"):
-            usage_issues.extend(usage["issues"])
+    if grammar:
+        executed.append("grammar_rules")
+    if usage:
+        executed.append("usage_clarity")
 
     # STEP 6: grammar score (UNCHANGED)
-    grammar_score = score_grammar(
-        sentence_results=sentence_results,
-        sentence_count=len(sentences),
+    if "grammar_score" in stages:
+        response["grammar"] = {
+            "score": score_grammar(
+                sentence_results=sentence_results,
+                sentence_count=len(sentences),
+            ),
+        }
+        executed.append("grammar_score")
+    if grammar:
+        response.setdefault("grammar", {})["details"] = sentence_results
+    if usage:
+        response["usage_clarity"] = {
+            "issues": usage_issues
+        }
+
+    # Spelling
+    if "spelling" in stages:
+        response["spelling"] = evaluate_spelling(normalized)
+        executed.append("spelling")
+
+    if prompt_id and sentences:
+        reused = sum(s["text"] in passage.analysis for s in sentences) if passage else 0
+        response["passage"] = {
+            "prompt_id": prompt_id,
+            "registered": passage is not None,
+            "reused_sentences": reused,
+            "sentence_count": len(sentences),
+            "reuse_fraction": reused / len(sentences),
+        }
+
+    response["stages"] = executed
+
+    explain_input = {
+        "summary": normalized,
+        "detected_errors": {
+            "_items": explanation_input,
+            "_sentences": error_sentences,
+        },
+    }
+
+    return response, explain_input
+
+
+def _analyze_scheduled(
+    summary: str,
+    priority: str,
+    level: int,
+    prompt_id: str | None = None,
+    stages: set[str] | None = None,
+    deadline: Deadline | None = None,
+) -> tuple[dict, dict]:
+    """
+    _analyze inside a CPU slot of the request's priority class, at the
+    request's degradation level. Time spent waiting for the slot counts
+    against the deadline, and a request whose deadline expires in the
+    queue gets 503 instead of a slot.
+    """
+
+    # Only the slot wait is bounded: the deadline ran out in the queue
+    try:
+        with cpu_scheduler.slot(
+            priority, timeout=deadline.remaining() if deadline else None
+        ), request_scope():
+            t0 = time.perf_counter()
+            response, explain_input = _analyze(
+                summary,
+                usage="usage_clarity" not in SKIPPED_STAGES[level],
+                prompt_id=prompt_id,
+                stages=stages,
+                deadline=deadline,
+            )
+            elapsed_ms = (time.perf_counter() - t0) * 1000
+    except TimeoutError:
+        raise _overloaded(Overloaded("deadline expired waiting for a CPU slot"))
+
+    # Reused passage results come from the full pipeline whatever the
+    # config; shadow compares configs only, on responses that carry
+    # everything it compares
+    if (
+        "long_document" not in response
+        and "passage" not in response
+        and {"grammar_score", "grammar_rules", "spelling"} <= set(response["stages"])
+    ):
+        shadow.maybe_submit(summary, response, elapsed_ms)
+
+    response["degradation"] = {
+        "level": level,
+        "skipped": SKIPPED_STAGES[level],
+    }
+    return response, explain_input
+
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail={"error": "overloaded", "message": e.reason},
+        headers={"Retry-After": str(e.retry_after)},
     )
 
-    # --------------------------------------------------
-    # BUILD LLM EXPLANATION INPUT (SENTENCE-AWARE)
-    # --------------------------------------------------
-    explanation_items = []
-
-    for packet in sentence_error_packets:
-        sent_text = packet["text"]
-        errs = packet["errors"]
-
-        # ---- Span-based errors (precise) ----
-        for key, value in errs.items():
-            if key.endswith("_spans") and isinstance(value, list):
-                err_type = key.replace("_spans", "")
-                for span in value:
-                    explanation_items.append({
-                        "type": err_type,
-                        "text_span": span
-                    })
-
-        # ---- Structural errors (sentence-level) ----
-        STRUCTURAL_ERRORS = [
-            "missing_verb",
-            "missing_subject",
-            "fragment",
-            "run_on",
-            "tense_error",
-            "clause_overload",
-        ]
-
-        for err_type in STRUCTURAL_ERRORS:
-            if errs.get(err_type, 0) > 0:
-                explanation_items.append({
-                    "type": err_type,
-                    "text_span": sent_text
-                })
-
-    # STEP 5: grammar explanation (LLM explains ONLY provided items)
-    grammar_explanation = (
-        explain_grammar_errors(
-            summary=normalized,
-            detected_errors={"_items": explanation_items},
+
+def _admit() -> int:
+    try:
+        return admission.admit()
+    except Overloaded as e:
+        raise _overloaded(e)
+
+
+async def admitted() -> AsyncIterator[int]:
+    """
+    Admission as an async dependency: it runs on the event loop, so a
+    rejected request never takes a threadpool thread. Yields the
+    degradation level; the slot is released once the handler is done.
+    """
+    level = _admit()
+    try:
+        yield level
+    finally:
+        admission.release()
+
+
+async def request_deadline(payload: EvaluateRequest) -> Deadline | None:
+    """
+    The request's Deadline, started on the event loop before the handler
+    is dispatched to the threadpool, so time queued for a thread counts.
+    """
+    return Deadline(payload.deadline_ms) if payload.deadline_ms else None
+
+
+def _finish_request() -> None:
+    admission.release()
+    memory_guard.after_request()
+
+
+def _parse_fields(fields: str | None) -> list[str] | None:
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _explain_allowed(explain_input: dict, level: int, deadline: Deadline | None) -> bool:
+    """
+    STEP 5 runs if there is something to explain, the degradation level
+    allows it and, with a deadline, at least DEADLINE_EXPLAIN_MIN_MS is left.
+    """
+
+    if not explain_input["detected_errors"]["_items"]:
+        return False
+    if "explanation" in SKIPPED_STAGES[level]:
+        return False
+    if deadline is not None and not deadline.allows(DEADLINE_EXPLAIN_MIN_MS):
+        deadline.skip("explanation")
+        return False
+    return True
+
+
+def _evaluate(
+    summary: str,
+    priority: str,
+    level: int,
+    prompt_id: str | None = None,
+    fields: str | None = None,
+    deadline: Deadline | None = None,
+) -> dict:
+    _check_input_limits(summary)
+    fields = _parse_fields(fields)
+    stages = required_stages(fields)
+
+    try:
+        current_priority.set(priority)
+        response, explain_input = _analyze_scheduled(
+            summary, priority, level, prompt_id, stages, deadline
         )
-        if explanation_items
-        else {"errors": []}
+
+        # STEP 5: grammar explanation (LLM explains ONLY provided items)
+        if "explanation" in stages:
+            explain = _explain_allowed(explain_input, level, deadline)
+            response.setdefault("grammar", {})["explanation"] = (
+                explain_grammar_errors(**explain_input, deadline=deadline)
+                if explain else {"errors": []}
+            )
+            if explain:
+                response["stages"].append("explanation")
+
+        if deadline is not None:
+            response["deadline"] = deadline.report()
+    finally:
+        memory_guard.after_request()
+
+    return project(response, fields)
+
+
+@app.post("/evaluate")
+def evaluate(
+    payload: EvaluateRequest,
+    x_priority: str | None = Header(default=None),
+    fields: str | None = Query(default=None),
+    deadline: Deadline | None = Depends(request_deadline),
+    level: int = Depends(admitted),
+):
+    """
+    X-Priority: interactive (default) | bulk
+    ?fields=grammar.score,spelling: return (and compute) only these fields
+    """
+    return _evaluate(
+        payload.summary,
+        resolve_priority(x_priority),
+        level,
+        payload.prompt_id,
+        fields,
+        deadline,
     )
 
-    # Spelling
-    spelling = evaluate_spelling(normalized)
 
+@app.post("/evaluate/bulk")
+def evaluate_bulk(
+    payload: EvaluateRequest,
+    fields: str | None = Query(default=None),
+    deadline: Deadline | None = Depends(request_deadline),
+    level: int = Depends(admitted),
+):
+    """
+    /evaluate for batch jobs: always scheduled in the bulk class.
+    """
+    return _evaluate(
+        payload.summary, BULK, level, payload.prompt_id, fields, deadline
+    )
+
+
+@app.post("/evaluate/stream")
+async def evaluate_stream(
+    payload: EvaluateRequest,
+    x_priority: str | None = Header(default=None),
+    fields: str | None = Query(default=None),
+    deadline: Deadline | None = Depends(request_deadline),
+):
+    """
+    Same evaluation as /evaluate, streamed as NDJSON events:
+
+    {"event": "result", ...}            scores/details, without explanations
+    {"event": "explanation", "error": {...}}   one per explanation, as generated
+    {"event": "done", "stages": [...]}  every stage executed
+                                        (+ "deadline" with deadline_ms)
+
+    The admission slot is held until the stream ends, and released by the
+    response's background task, which also runs if the client disconnects.
+    """
+
+    _check_input_limits(payload.summary)
+    fields = _parse_fields(fields)
+    stages = required_stages(fields)
+
+    level = _admit()
+    try:
+        priority = resolve_priority(x_priority)
+        current_priority.set(priority)
+        response, explain_input = await run_in_threadpool(
+            _analyze_scheduled,
+            payload.summary,
+            priority,
+            level,
+            payload.prompt_id,
+            stages,
+            deadline,
+        )
+    except BaseException:
+        admission.release()
+        raise
+
+    async def events():
+        if deadline is not None:
+            response["deadline"] = deadline.report()
+        yield json.dumps({"event": "result", **project(response, fields)}) + "\n"
+
+        if "explanation" in stages and _explain_allowed(explain_input, level, deadline):
+            response["stages"].append("explanation")
+            async for err in astream_grammar_explanations(
+                **explain_input, deadline=deadline
+            ):
+                yield json.dumps({"event": "explanation", "error": err}) + "\n"
+
+        done = {"event": "done", "stages": response["stages"]}
+        if deadline is not None:
+            done["deadline"] = deadline.report()
+        yield json.dumps(done) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(_finish_request),
+    )
+
+
+@app.post("/passages")
+def register_passage(payload: PassageRequest):
+    """
+    Register a source passage under a prompt ID: its sentences are
+    segmented and analysed once, then reused by /evaluate requests that
+    carry the prompt ID.
+    """
+    _check_input_limits(payload.passage)
+    with cpu_scheduler.slot(BULK):
+        passage = passages.register(payload.prompt_id, payload.passage)
+    return {"prompt_id": passage.prompt_id, "sentence_count": len(passage.analysis)}
+
+
+@app.get("/passages")
+def list_passages():
+    return {"prompt_ids": passages.ids()}
+
+
+@app.delete("/passages/{prompt_id}")
+def delete_passage(prompt_id: str):
+    if not passages.remove(prompt_id):
+        raise HTTPException(status_code=404, detail="unknown prompt_id")
+    return {"prompt_id": prompt_id, "deleted": True}
+
+
+@app.get("/llm/stats")
+def get_llm_stats():
+    """
+    LLM routing state: backend ranking, EWMA latency / error rate, health.
+    """
+    return llm_stats()
+
+
+@app.get("/scheduler/stats")
+def get_scheduler_stats():
+    """
+    Admission state, and per-class queue depth and wait times for the
+    CPU and LLM slots.
+    """
     return {
-        "grammar": {
-            "score": grammar_score,
-            "details": sentence_results,
-            "explanation": grammar_explanation,
-        },
-        "usage_clarity": {
-            "issues": usage_issues
-        },
-        "spelling": spelling,
+        "admission": admission.snapshot(),
+        "cpu": cpu_scheduler.snapshot(),
+        "llm": llm_scheduler.snapshot(),
     }
+
+
+@app.get("/shadow/stats")
+def get_shadow_stats():
+    """
+    Shadow comparison: match rate, drops, primary vs shadow latency.
+    """
+    return shadow.snapshot()
+
+
+@app.get("/memory/stats")
+def get_memory_stats():
+    """
+    Worker RSS, StringStore sizes per pipeline, model reloads and recycling state.
+    """
+    return memory_guard.snapshot()
+
+
+@app.get("/profiler/stats")
+def get_profiler_stats(seconds: int | None = Query(default=None, gt=0)):
+    """
+    Sampling profiler: samples per pipeline stage and measured overhead.
+    """
+    return profiler.snapshot(seconds)
+
+
+@app.get("/profiler/folded", response_class=PlainTextResponse)
+def get_profiler_folded(seconds: int | None = Query(default=None, gt=0)):
+    """
+    Folded stacks of the last `seconds` (default: whole window), rooted at
+    the pipeline stage: pipe into flamegraph.pl or load in speedscope.
+    """
+    return profiler.folded(seconds)
@@ -0,0 +1,118 @@
+import os
+import resource
+import signal
+import sys
+import threading
+import time
+
+from config import (
+    MEM_CHECK_EVERY,
+    MEM_MAX_STRINGS,
+    MEM_RECYCLE_REQUESTS,
+    MEM_RECYCLE_RSS_MB,
+)
+from nlp import reload_models, string_store_sizes
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kB on Linux, bytes on macOS
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class MemoryGuard:
+    """
+    Keeps long-running workers from growing without bound.
+
+    Every MEM_CHECK_EVERY requests the StringStore sizes and RSS are
+    sampled. Policy:
+    - StringStore of any pipeline above MEM_MAX_STRINGS -> fresh model
+      instances are loaded in a background thread and swapped in
+      (nlp.reload_models); in-flight requests finish on the old ones.
+    - MEM_RECYCLE_REQUESTS requests served or RSS above MEM_RECYCLE_RSS_MB
+      -> the worker sends itself SIGTERM. Uvicorn stops accepting new
+      connections and finishes in-flight requests before exiting, and the
+      supervisor (gunicorn / --workers) starts a fresh worker.
+    """
+
+    def __init__(self, check_every: int, max_strings: int,
+                 recycle_requests: int, recycle_rss_mb: int):
+        self.check_every = max(1, check_every)
+        self.max_strings = max_strings
+        self.recycle_requests = recycle_requests
+        self.recycle_rss_mb = recycle_rss_mb
+        self.requests = 0
+        self.reloads = 0
+        self.recycling = False
+        self.last = {}
+        self._reloading = False
+        self._lock = threading.Lock()
+
+    def after_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+            if self.requests % self.check_every:
+                return
+        self.check()
+
+    def check(self) -> dict:
+        sizes = string_store_sizes()
+        rss = rss_mb()
+        self.last = {"rss_mb": rss, "pipelines": sizes, "at": time.time()}
+
+        largest = max((s["strings"] for s in sizes.values()), default=0)
+        if self.max_strings and largest > self.max_strings:
+            self._reload()
+
+        if not self.recycling and (
+            (self.recycle_requests and self.requests >= self.recycle_requests)
+            or (self.recycle_rss_mb and rss > self.recycle_rss_mb)
+        ):
+            self.recycling = True
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        return self.last
+
+    def _reload(self) -> None:
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+
+        def run():
+            reloaded = False
+            try:
+                reload_models()
+                reloaded = True
+            finally:
+                with self._lock:
+                    self.reloads += reloaded
+                    self._reloading = False
+
+        threading.Thread(target=run, name="nlp-reload", daemon=True).start()
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "reloads": self.reloads,
+            "reloading": self._reloading,
+            "recycling": self.recycling,
+            "rss_mb": rss_mb(),
+            "pipelines": string_store_sizes(),
+            "limits": {
+                "max_strings": self.max_strings,
+                "recycle_requests": self.recycle_requests,
+                "recycle_rss_mb": self.recycle_rss_mb,
+            },
+        }
+
+
+memory_guard = MemoryGuard(
+    MEM_CHECK_EVERY, MEM_MAX_STRINGS, MEM_RECYCLE_REQUESTS, MEM_RECYCLE_RSS_MB
+)
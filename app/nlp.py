@@ -1,19 +1,285 @@
+import contextlib
+import contextvars
+import queue
 import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import spacy
 
+from config import NLP_PARSE_THREADS, NLP_POOL_SIZE
+
+if NLP_PARSE_THREADS > 1 and NLP_POOL_SIZE <= 1:
+    raise ValueError(
+        "NLP_PARSE_THREADS > 1 needs NLP_POOL_SIZE > 1 (one instance per parse thread)"
+    )
+
 _nlp = None
 _lock = threading.Lock()
 
+# Pooled instance checked out by the current request / parse thread
+_checked_out = contextvars.ContextVar("nlp_checked_out", default=None)
+
+_segmenters = {}
+
+# Components excluded per segmentation mode. The tagger (+ attribute_ruler for
+# coarse POS) is kept in every mode because the run-on heuristic counts VERBs.
+_SEGMENTER_EXCLUDE = {
+    "senter": ["parser", "ner", "lemmatizer"],
+    "sentencizer": ["parser", "ner", "lemmatizer", "senter"],
+}
+
+
+class ModelPool:
+    """
+    Up to `size` full-pipeline instances, loaded on first demand and
+    checked out by one user (request or parse thread) at a time, so no
+    pooled instance runs in two threads at once. Checkout blocks while
+    all instances are busy.
+
+    Only the full pipeline is pooled: the cascade tagger (get_tagger) and
+    the senter / sentencizer segmenters (get_segmenter) stay one shared
+    instance each, called from every request thread.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self.instances = []
+        self._loading = 0
+        self._free = queue.Queue()
+        self._lock = threading.Lock()
+
+    def preload(self, count: int) -> "ModelPool":
+        for _ in range(min(count, self.size)):
+            self._free.put(self._load())
+        return self
+
+    def _load(self):
+        nlp = spacy.load("en_core_web_sm")
+        with self._lock:
+            self.instances.append(nlp)
+        return nlp
+
+    def _acquire(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            grow = len(self.instances) + self._loading < self.size
+            if grow:
+                self._loading += 1
+        if not grow:
+            return self._free.get()
+        try:
+            return self._load()
+        finally:
+            with self._lock:
+                self._loading -= 1
+
+    @contextlib.contextmanager
+    def checkout(self):
+        nlp = self._acquire()
+        token = _checked_out.set(nlp)
+        try:
+            yield nlp
+        finally:
+            _checked_out.reset(token)
+            self._free.put(nlp)
+
+
+_pool = ModelPool(NLP_POOL_SIZE) if NLP_POOL_SIZE > 1 else None
+_parse_executor = None
+
+
+@contextlib.contextmanager
+def checkout():
+    """
+    Binds a pooled instance to the current context: get_nlp() returns it
+    until the block exits. Without a pool (NLP_POOL_SIZE=1) or when an
+    instance is already bound, get_nlp() keeps its current answer.
+    """
+    pool = _pool
+    if pool is None or _checked_out.get() is not None:
+        yield get_nlp()
+        return
+    with pool.checkout() as nlp:
+        yield nlp
+
+
+def request_scope():
+    """
+    Per-request checkout (see checkout), except when parsing is sharded
+    over threads: the parse threads then check out per shard, and a
+    request holding an instance could starve them. Requests then check
+    out per call instead (parse / parse_one), never while waiting on
+    their shards.
+    """
+    if NLP_PARSE_THREADS > 1:
+        return contextlib.nullcontext()
+    return checkout()
+
+
+def parse(texts: list[str]) -> list:
+    """
+    Full-pipeline parse (nlp.pipe) of `texts`, in order.
+
+    With NLP_PARSE_THREADS > 1 and a pool, the texts are split into one
+    contiguous shard per thread and parsed concurrently, each shard on
+    its own checked-out instance; thinc / the parser release the GIL in
+    parts of inference, which is where the threads gain.
+    """
+    global _parse_executor
+
+    if NLP_PARSE_THREADS <= 1 or _pool is None or len(texts) < 2:
+        with checkout() as nlp:
+            return list(nlp.pipe(texts))
+
+    if _parse_executor is None:
+        with _lock:
+            if _parse_executor is None:
+                _parse_executor = ThreadPoolExecutor(
+                    max_workers=NLP_PARSE_THREADS, thread_name_prefix="parse"
+                )
+
+    shards = min(NLP_PARSE_THREADS, len(texts))
+    step = -(-len(texts) // shards)
+    futures = [
+        _parse_executor.submit(_parse_shard, texts[i:i + step])
+        for i in range(0, len(texts), step)
+    ]
+    return [doc for f in futures for doc in f.result()]
+
+
+def _parse_shard(texts: list[str]) -> list:
+    with checkout() as nlp:
+        return list(nlp.pipe(texts))
+
+
+def parse_one(text: str):
+    """
+    Full-pipeline parse of one text, on an instance no other thread is
+    using when there is a pool (see checkout).
+    """
+    with checkout() as nlp:
+        return nlp(text)
+
 
 def get_nlp():
     """
-    Returns the shared spaCy NLP model instance.
+    Returns the spaCy NLP model instance: the one checked out by the
+    current request / parse thread if any, else the shared instance.
     Loads 'en_core_web_sm' lazily on first call.
     Thread-safe.
     """
     global _nlp
+    checked_out = _checked_out.get()
+    if checked_out is not None:
+        return checked_out
     if _nlp is None:
         with _lock:
             if _nlp is None:  # Double-check locking
                 _nlp = spacy.load("en_core_web_sm")
-    return _nlp
\ No newline at end of file
+    return _nlp
+
+
+def _load_segmenter(mode: str):
+    seg = spacy.load("en_core_web_sm", exclude=_SEGMENTER_EXCLUDE[mode])
+    if mode == "senter":
+        seg.enable_pipe("senter")
+    else:
+        seg.add_pipe("sentencizer", first=True)
+    return seg
+
+
+def string_store_sizes() -> dict:
+    """
+    StringStore / lexeme counts of every loaded pipeline.
+    Both grow with each unseen token (typos included) and never shrink.
+    """
+    loaded = {"parser": _nlp, **_segmenters}
+    if _pool is not None:
+        loaded.update({f"pool[{i}]": p for i, p in enumerate(list(_pool.instances))})
+    return {
+        name: {"strings": len(p.vocab.strings), "lexemes": len(p.vocab)}
+        for name, p in loaded.items()
+        if p is not None
+    }
+
+
+def reload_models() -> None:
+    """
+    Replaces every loaded pipeline with a fresh instance (empty vocab).
+
+    The new instances are loaded before the swap, so callers never wait
+    on a load. Requests already holding the old instance (or Docs built
+    from it) keep using it; it is freed once the last of them finishes.
+    A model pool is replaced by a new one with as many instances loaded;
+    checked-out instances go back to the old pool and are dropped with it.
+    """
+    global _nlp, _pool
+    fresh = {}
+    pool = ModelPool(_pool.size).preload(len(_pool.instances)) if _pool else None
+    if _nlp is not None:
+        fresh["parser"] = spacy.load("en_core_web_sm")
+    if "tagger" in _segmenters:
+        fresh["tagger"] = spacy.load(
+            "en_core_web_sm", exclude=["parser", "ner", "lemmatizer", "senter"]
+        )
+    for mode in _SEGMENTER_EXCLUDE:
+        if mode in _segmenters:
+            fresh[mode] = _load_segmenter(mode)
+
+    with _lock:
+        if "parser" in fresh:
+            _nlp = fresh.pop("parser")
+        _segmenters.update(fresh)
+        if pool is not None:
+            _pool = pool
+
+
+def get_tagger():
+    """
+    Returns a tagger-only pipeline (tok2vec + tagger + attribute_ruler):
+    POS/TAG without the parser, NER or lemmatizer.
+    Used by the cascade's cheap first tier. Loading is thread-safe; the
+    instance is shared by all threads (not pooled, see ModelPool).
+    """
+    tagger = _segmenters.get("tagger")
+    if tagger is None:
+        with _lock:
+            tagger = _segmenters.get("tagger")
+            if tagger is None:
+                tagger = spacy.load(
+                    "en_core_web_sm",
+                    exclude=["parser", "ner", "lemmatizer", "senter"],
+                )
+                _segmenters["tagger"] = tagger
+    return tagger
+
+
+def get_segmenter(mode: str):
+    """
+    Returns a lightweight pipeline used only for sentence segmentation.
+
+    Modes:
+    - "parser":      the shared full pipeline (dependency-based boundaries)
+    - "senter":      statistical sentence recognizer + tagger, no parser/NER
+    - "sentencizer": rule-based punctuation splitter + tagger, no parser/NER
+
+    Loaded lazily, one instance per mode, shared by all threads (only
+    "parser" goes through the pool, see ModelPool).
+    """
+    if mode == "parser":
+        return get_nlp()
+
+    if mode not in _SEGMENTER_EXCLUDE:
+        raise ValueError(f"Unknown segmentation mode: {mode}")
+
+    seg = _segmenters.get(mode)
+    if seg is None:
+        with _lock:
+            seg = _segmenters.get(mode)
+            if seg is None:
+                seg = _load_segmenter(mode)
+                _segmenters[mode] = seg
+    return seg
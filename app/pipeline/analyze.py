@@ -0,0 +1,245 @@
+# app/pipeline/analyze.py
+
+from itertools import islice
+from typing import Iterable, Iterator
+
+from config import (
+    ANALYZE_BATCH_SIZE,
+    CASCADE_MODE,
+    DEADLINE_USAGE_MIN_MS,
+    LONG_DOC_MAX_EXPLANATION_ITEMS,
+    LONG_DOC_MAX_USAGE_ISSUES,
+    STREAM_CHUNK_CHARS,
+)
+from nlp import parse
+from pipeline.features import batch_features, feature_row
+from pipeline.grammar_cascade import screen_sentence
+from pipeline.grammar_rules import analyze_grammar_rules
+from pipeline.grammar_score import classify_sentence, score_from_counts
+from pipeline.grammar_spacy import refine_with_spacy
+from pipeline.normalize import iter_normalized_chunks
+from pipeline.projection import STAGES
+from pipeline.segment import iter_sentences
+from pipeline.spelling import evaluate_spelling_stream
+from pipeline.usage_clarity import analyze_usage_clarity
+
+# Sentence-level errors explained against the whole sentence
+STRUCTURAL_ERRORS = [
+    "missing_verb",
+    "missing_subject",
+    "fragment",
+    "run_on",
+    "tense_error",
+    "clause_overload",
+]
+
+
+def analyze_batch(
+    texts: list[str],
+    usage: bool = True,
+    cascade: bool = CASCADE_MODE,
+    grammar: bool = True,
+) -> list[tuple[dict, list[dict]]]:
+    """
+    STEP 3 + 4 (+ usage) for a batch of sentences.
+    Returns [(grammar errors, usage issues), ...] in input order; usage/clarity
+    is skipped (no issues) when `usage` is False, the grammar rules (zeroed
+    errors) when `grammar` is False.
+
+    Sentences are parsed once, together (nlp.pipe), and the count-based
+    checks read vectorized aggregates from batch_features; only rules
+    that walk the tree loop over tokens.
+
+    In cascade mode, screen_sentence (tagger only) runs first and the
+    parser-based rules / usage checks only run if it flags the sentence.
+    """
+
+    screens = [
+        screen_sentence(t) if cascade else {"grammar": True, "usage": True}
+        for t in texts
+    ]
+    if not grammar:
+        screens = [{**sc, "grammar": False} for sc in screens]
+    need = [
+        i for i, sc in enumerate(screens)
+        if sc["grammar"] or (usage and sc["usage"])
+    ]
+
+    docs = dict(zip(need, parse([texts[i] for i in need])))
+    feats = batch_features([docs[i] for i in need])
+    rows = {i: feature_row(feats, n) for n, i in enumerate(need)}
+
+    results = []
+    for i, text in enumerate(texts):
+        if screens[i]["grammar"]:
+            errors = analyze_grammar_rules(text, docs[i], rows[i])
+            errors = refine_with_spacy(text, errors, docs[i], rows[i])
+        else:
+            # Empty input yields the zeroed error dict (counts + span lists)
+            errors = analyze_grammar_rules("")
+
+        issues = []
+        if usage and screens[i]["usage"]:
+            issues = analyze_usage_clarity(text, docs[i]).get("issues", [])
+
+        results.append((errors, issues))
+
+    return results
+
+
+def analyze_sentence(
+    text: str, usage: bool = True, cascade: bool = CASCADE_MODE
+) -> tuple[dict, list[dict]]:
+    """
+    STEP 3 + 4 (+ usage) for one sentence (see analyze_batch).
+    """
+
+    return analyze_batch([text], usage, cascade)[0]
+
+
+def iter_analyzed(
+    sentences: Iterable[dict], usage: bool = True, passage=None, grammar: bool = True
+) -> Iterator[tuple[str, dict, list[dict]]]:
+    """
+    Generator pipeline: yields (sentence text, errors, usage issues)
+    one sentence at a time, analysing ANALYZE_BATCH_SIZE at once.
+    `usage` / `grammar` as in analyze_batch.
+
+    With a `passage` (pipeline.passages.Passage), sentences copied from it
+    are served from its precomputed analysis and never parsed.
+    """
+
+    sentences = iter(sentences)
+    while True:
+        batch = [s["text"] for s in islice(sentences, ANALYZE_BATCH_SIZE)]
+        if not batch:
+            return
+
+        cached = [passage.lookup(t, usage) if passage else None for t in batch]
+        misses = [t for t, hit in zip(batch, cached) if hit is None]
+        fresh = iter(
+            analyze_batch(misses, usage, grammar=grammar) if misses else []
+        )
+
+        for text, hit in zip(batch, cached):
+            errors, issues = hit or next(fresh)
+            yield text, errors, issues
+
+
+def explanation_items(sent_text: str, errs: dict) -> list[dict]:
+    """
+    LLM explanation input for one sentence (SENTENCE-AWARE).
+    Each item carries its source sentence, sent as the item's context.
+    """
+
+    items = []
+
+    # ---- Span-based errors (precise) ----
+    for key, value in errs.items():
+        if key.endswith("_spans") and isinstance(value, list):
+            err_type = key.replace("_spans", "")
+            for span in value:
+                items.append({
+                    "type": err_type,
+                    "text_span": span,
+                    "sentence": sent_text,
+                })
+
+    # ---- Structural errors (sentence-level) ----
+    for err_type in STRUCTURAL_ERRORS:
+        if errs.get(err_type, 0) > 0:
+            items.append({
+                "type": err_type,
+                "text_span": sent_text,
+                "sentence": sent_text,
+            })
+
+    return items
+
+
+def analyze_long_document(
+    summary: str,
+    usage: bool = True,
+    stages: set[str] | None = None,
+    passage=None,
+    deadline=None,
+) -> dict:
+    """
+    Long-document mode: bounded-memory analysis of a large input.
+
+    The raw text is normalized and segmented chunk by chunk, sentences go
+    through the `iter_analyzed` generator, and scores are aggregated
+    incrementally. Per-sentence details are not kept; explanation items and
+    usage issues are capped (config.LONG_DOC_MAX_*), so working memory does
+    not grow with the number of sentences.
+
+    Only `stages` (see projection.required_stages; default all) run; the
+    results of the others are None. Sentences copied from a `passage`
+    reuse its analysis. With a `deadline` (deadline.Deadline), usage/clarity
+    stops for the rest of the document once less than
+    DEADLINE_USAGE_MIN_MS is left ("usage_clarity:partial").
+    """
+
+    stages = set(STAGES) if stages is None else stages
+    grammar = "grammar_rules" in stages
+    usage = usage and "usage_clarity" in stages
+    explain = "explanation" in stages
+
+    counts = {"critical": 0, "major": 0, "minor": 0}
+    sentence_count = 0
+    items = []
+    item_keys = set()
+    item_sentences = []
+    usage_issues = []
+
+    sentences = iter(iter_sentences(
+        iter_normalized_chunks(summary, STREAM_CHUNK_CHARS)
+    )) if grammar or usage else iter(())
+
+    while True:
+        batch = list(islice(sentences, ANALYZE_BATCH_SIZE))
+        if not batch:
+            break
+        if usage and deadline is not None and not deadline.allows(DEADLINE_USAGE_MIN_MS):
+            usage = False
+            deadline.skip("usage_clarity:partial")
+
+        for text, errors, issues in iter_analyzed(batch, usage, passage, grammar):
+            sentence_count += 1
+
+            bucket = classify_sentence(errors)
+            if bucket:
+                counts[bucket] += 1
+
+            added = False
+            for item in explanation_items(text, errors) if explain else []:
+                if len(items) >= LONG_DOC_MAX_EXPLANATION_ITEMS:
+                    break
+                key = (item["type"], item["text_span"])
+                if key not in item_keys:
+                    item_keys.add(key)
+                    items.append(item)
+                    added = True
+            if added:
+                item_sentences.append(text)
+
+            room = LONG_DOC_MAX_USAGE_ISSUES - len(usage_issues)
+            if room > 0:
+                usage_issues.extend(issues[:room])
+
+    spelling = evaluate_spelling_stream(
+        iter_normalized_chunks(summary, STREAM_CHUNK_CHARS)
+    ) if "spelling" in stages else None
+
+    return {
+        "grammar_score": (
+            score_from_counts(counts, sentence_count)
+            if "grammar_score" in stages else None
+        ),
+        "sentence_count": sentence_count,
+        "severity_counts": counts if grammar else None,
+        "explanation_items": items,
+        "explanation_sentences": item_sentences,
+        "usage_issues": usage_issues if "usage_clarity" in stages else None,
+        "spelling": spelling,
+    }
@@ -0,0 +1,205 @@
+# app/pipeline/explain_index.py
+
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from config import (
+    EXPLAIN_INDEX_MAX_PER_TYPE,
+    EXPLAIN_INDEX_THRESHOLD,
+    EXPLAIN_INDEX_THRESHOLDS,
+)
+
+# Hashed character n-gram space
+DIM = 2048
+NGRAM_RANGE = (2, 4)
+
+# Contractions are expanded first so "doesn't has" matches "does not has"
+_CONTRACTIONS = [
+    (re.compile(r"can[’']t\b"), "can not"),
+    (re.compile(r"won[’']t\b"), "will not"),
+    (re.compile(r"n[’']t\b"), " not"),
+    (re.compile(r"[’']re\b"), " are"),
+    (re.compile(r"[’']ve\b"), " have"),
+    (re.compile(r"[’']ll\b"), " will"),
+    (re.compile(r"[’']m\b"), " am"),
+]
+
+
+def _canonical(text: str) -> str:
+    text = text.lower()
+    for pattern, expansion in _CONTRACTIONS:
+        text = pattern.sub(expansion, text)
+    return " " + " ".join(text.split()) + " "
+
+
+def vectorize(text: str) -> np.ndarray:
+    """
+    Sublinear term frequencies of the hashed character n-grams of `text`
+    (lowercased, contractions expanded, whitespace-collapsed, padded).
+    """
+
+    text = _canonical(text)
+    buckets = [
+        zlib.crc32(text[i:i + n].encode()) % DIM
+        for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1)
+        for i in range(len(text) - n + 1)
+    ]
+    tf = np.bincount(buckets, minlength=DIM).astype(np.float32)
+    nz = tf > 0
+    tf[nz] = 1 + np.log(tf[nz])
+    return tf
+
+
+class _TypeIndex:
+    """
+    Explanations of one error type: a ring of TF rows (grown by doubling
+    up to `capacity`) plus document frequencies, so adds are O(DIM) and
+    the oldest entry is evicted once full. The TF-IDF matrix is rebuilt
+    lazily on the first lookup after a change. Callers hold `lock`.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.tf = np.zeros((min(64, capacity), DIM), dtype=np.float32)
+        self.df = np.zeros(DIM, dtype=np.float32)
+        self.spans = []
+        self.descriptions = []
+        self.rows = {}
+        self.size = 0
+        self._next = 0
+        self._matrix = None
+        self._idf = None
+        self.lock = threading.Lock()
+
+    def add(self, span: str, description: str) -> None:
+        row = self.rows.get(span)
+        if row is not None:
+            self.descriptions[row] = description
+            return
+
+        row = self._next
+        if self.size == self.capacity:
+            self.df -= self.tf[row] > 0
+            del self.rows[self.spans[row]]
+            self.spans[row] = span
+            self.descriptions[row] = description
+        else:
+            if self.size == len(self.tf):
+                grown = np.zeros((min(2 * self.size, self.capacity), DIM), dtype=np.float32)
+                grown[:self.size] = self.tf
+                self.tf = grown
+            self.spans.append(span)
+            self.descriptions.append(description)
+            self.size += 1
+
+        self.tf[row] = vectorize(span)
+        self.df += self.tf[row] > 0
+        self.rows[span] = row
+        self._next = (row + 1) % self.capacity
+        self._matrix = None
+
+    def nearest(self, span: str) -> tuple[int, float] | None:
+        if not self.size:
+            return None
+
+        if self._matrix is None:
+            self._idf = np.log((1 + self.size) / (1 + self.df)) + 1
+            m = self.tf[:self.size] * self._idf
+            norms = np.linalg.norm(m, axis=1, keepdims=True)
+            self._matrix = m / np.maximum(norms, 1e-12)
+
+        q = vectorize(span) * self._idf
+        q /= max(float(np.linalg.norm(q)), 1e-12)
+        sims = self._matrix @ q
+        best = int(np.argmax(sims))
+        return best, float(sims[best])
+
+
+class ExplanationIndex:
+    """
+    Retrieval index of previously generated explanations, per error type.
+
+    Spans are compared by cosine similarity of character n-gram TF-IDF
+    vectors, so "doesn't has" and "does not has" can share an explanation.
+    A lookup hits when the nearest stored span of the same type is at
+    least the type's threshold (EXPLAIN_INDEX_THRESHOLDS, else
+    EXPLAIN_INDEX_THRESHOLD). Each type keeps at most `max_per_type`
+    explanations, oldest evicted first; with `max_per_type` < 1 nothing
+    is stored and every lookup misses. Thread-safe: each type has its
+    own lock, so lookups and inserts of different types never wait on
+    each other.
+    """
+
+    def __init__(
+        self,
+        threshold: float = EXPLAIN_INDEX_THRESHOLD,
+        thresholds: dict | None = None,
+        max_per_type: int = EXPLAIN_INDEX_MAX_PER_TYPE,
+    ):
+        self.threshold = threshold
+        self.thresholds = dict(thresholds or {})
+        self.max_per_type = max_per_type
+        self.lookups = 0
+        self.hits = 0
+        self._types = {}
+        self._lock = threading.Lock()
+
+    def threshold_for(self, err_type: str) -> float:
+        return self.thresholds.get(err_type, self.threshold)
+
+    def lookup(self, err_type: str, span: str) -> dict | None:
+        """
+        Returns {"type", "text_span", "description", "similarity",
+        "matched_span"} for the nearest stored explanation, or None.
+        """
+
+        with self._lock:
+            self.lookups += 1
+            index = self._types.get(err_type)
+        if index is None:
+            return None
+
+        with index.lock:
+            found = index.nearest(span)
+            if found is None or found[1] < self.threshold_for(err_type):
+                return None
+            row, similarity = found
+            hit = {
+                "type": err_type,
+                "text_span": span,
+                "description": index.descriptions[row],
+                "similarity": similarity,
+                "matched_span": index.spans[row],
+            }
+        with self._lock:
+            self.hits += 1
+        return hit
+
+    def add(self, err_type: str, span: str, description: str) -> None:
+        if not span or not description or self.max_per_type < 1:
+            return
+        with self._lock:
+            index = self._types.get(err_type)
+            if index is None:
+                index = self._types[err_type] = _TypeIndex(self.max_per_type)
+        with index.lock:
+            index.add(span, description)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else None,
+                "threshold": self.threshold,
+                "thresholds": self.thresholds,
+                "sizes": {t: idx.size for t, idx in self._types.items()},
+            }
+
+
+explanation_index = ExplanationIndex(
+    EXPLAIN_INDEX_THRESHOLD, EXPLAIN_INDEX_THRESHOLDS, EXPLAIN_INDEX_MAX_PER_TYPE
+)
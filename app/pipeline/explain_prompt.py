@@ -0,0 +1,101 @@
+# app/pipeline/explain_prompt.py
+
+import json
+
+from config import LLM_PROMPT_TOKEN_BUDGET
+from utils.text import estimate_tokens
+
+# A fragment explanation already covers the missing verb / subject
+# reported for the very same span.
+_SUBSUMED_BY_FRAGMENT = {"missing_verb", "missing_subject"}
+
+
+def dedup_items(items: list[dict]) -> list[dict]:
+    """
+    Drop repeated (type, text_span) items, keeping first-seen order, and
+    missing_verb / missing_subject items whose span is also a fragment.
+    """
+
+    fragment_spans = {
+        i["text_span"] for i in items if i.get("type") == "fragment"
+    }
+
+    seen = set()
+    unique = []
+    for item in items:
+        span = item.get("text_span")
+        if not span or not isinstance(span, str):
+            continue
+        if item["type"] in _SUBSUMED_BY_FRAGMENT and span in fragment_spans:
+            continue
+        key = (item["type"], span)
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def build_explanation_prompt(
+    system_prompt: str,
+    items: list[dict],
+    sentences: list[str],
+    budget: int = LLM_PROMPT_TOKEN_BUDGET,
+) -> dict:
+    """
+    Token-efficient user prompt for explain_grammar_errors.
+
+    - Items are deduplicated and sent as compact [type, text_span] pairs
+    - Only the source sentences of included items are sent as context
+      (item["sentence"]; items without one fall back to the first
+      sentence containing the span)
+    - Items are added in order until the estimated prompt size
+      (system + user) would exceed `budget`; the rest are dropped
+
+    Returns {"prompt", "items", "dropped", "estimated_tokens"}.
+    """
+
+    items = dedup_items(items)
+
+    header = (
+        "Sentences containing errors:\n{sentences}\n\n"
+        "Explain these grammar errors, given as a JSON array of "
+        "[type, text_span] pairs. Keep each type unchanged.\n{pairs}"
+    )
+    used = estimate_tokens(system_prompt) + estimate_tokens(header)
+
+    included = []
+    context = []
+    for item in items:
+        cost = estimate_tokens(json.dumps([item["type"], item["text_span"]]))
+
+        sent = item.get("sentence") or next(
+            (s for s in sentences if item["text_span"] in s), None
+        )
+        new_context = sent is not None and sent not in context
+        if new_context:
+            cost += estimate_tokens(sent)
+
+        if used + cost > budget and included:
+            break
+
+        used += cost
+        included.append(item)
+        if new_context:
+            context.append(sent)
+
+    pairs = json.dumps(
+        [[i["type"], i["text_span"]] for i in included],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    prompt = header.format(
+        sentences="\n".join(f"- {s}" for s in context),
+        pairs=pairs,
+    )
+
+    return {
+        "prompt": prompt,
+        "items": included,
+        "dropped": len(items) - len(included),
+        "estimated_tokens": estimate_tokens(system_prompt) + estimate_tokens(prompt),
+    }
@@ -0,0 +1,128 @@
+# app/pipeline/features.py
+
+import numpy as np
+from spacy.attrs import DEP, LEMMA, LOWER, ORTH, POS, SENT_START, TAG
+from spacy.symbols import AUX, VERB
+
+# Token attributes exported per doc with Doc.to_array
+FEATURE_ATTRS = [POS, TAG, DEP, LEMMA, LOWER, ORTH, SENT_START]
+_COL = {attr: i for i, attr in enumerate(FEATURE_ATTRS)}
+
+SUBJECT_DEPS = ("nsubj", "nsubjpass")
+SENT_END_PUNCT = (".", "!", "?")
+CLAUSE_WORDS = ("and", "but", "which", "that")
+SUBORDINATORS = ("while", "although", "because", "if", "when")
+
+# Aggregate name -> per-token mask; counts are summed per doc / sentence
+FEATURES = [
+    "tokens",
+    "verbs",           # POS == VERB
+    "verbs_aux",       # POS in (VERB, AUX)
+    "root_verbs",      # DEP == ROOT and POS in (VERB, AUX)
+    "subjects",        # DEP in SUBJECT_DEPS
+    "cc",              # DEP == cc
+    "sent_punct",      # ORTH in SENT_END_PUNCT
+    "clause_words",    # LOWER in CLAUSE_WORDS
+    "subordinators",   # LOWER in SUBORDINATORS
+    "sent_starts",     # SENT_START == 1
+]
+
+
+def _ids(strings, values) -> np.ndarray:
+    return np.array([strings[v] for v in values], dtype=np.uint64)
+
+
+def _token_masks(tokens: np.ndarray, strings) -> dict[str, np.ndarray]:
+    pos = tokens[:, _COL[POS]]
+    dep = tokens[:, _COL[DEP]]
+    lower = tokens[:, _COL[LOWER]]
+
+    verbs = pos == VERB
+    verbs_aux = verbs | (pos == AUX)
+
+    return {
+        "tokens": np.ones(len(tokens), dtype=bool),
+        "verbs": verbs,
+        "verbs_aux": verbs_aux,
+        "root_verbs": verbs_aux & (dep == strings["ROOT"]),
+        "subjects": np.isin(dep, _ids(strings, SUBJECT_DEPS)),
+        "cc": dep == strings["cc"],
+        "sent_punct": np.isin(tokens[:, _COL[ORTH]], _ids(strings, SENT_END_PUNCT)),
+        "clause_words": np.isin(lower, _ids(strings, CLAUSE_WORDS)),
+        "subordinators": np.isin(lower, _ids(strings, SUBORDINATORS)),
+        # SENT_START is -1 / 0 / 1, exported as uint64
+        "sent_starts": tokens[:, _COL[SENT_START]] == 1,
+    }
+
+
+def batch_features(docs: list, by: str = "doc") -> dict[str, np.ndarray]:
+    """
+    Vectorized per-doc (by="doc") or per-sentence (by="sent") aggregates
+    over a whole batch of docs.
+
+    All docs are exported with one Doc.to_array call each, concatenated,
+    and every FEATURES count is a single np.add.reduceat over the batch.
+    Returns {feature: int array}; by="sent" adds "doc_index" (the doc each
+    sentence belongs to).
+    """
+
+    if not docs:
+        out = {name: np.zeros(0, dtype=np.int64) for name in FEATURES}
+        if by == "sent":
+            out["doc_index"] = np.zeros(0, dtype=np.int64)
+        return out
+
+    strings = docs[0].vocab.strings
+    lengths = np.array([len(d) for d in docs], dtype=np.int64)
+    tokens = np.concatenate([
+        d.to_array(FEATURE_ATTRS).reshape(len(d), len(FEATURE_ATTRS)).astype(np.uint64)
+        for d in docs
+    ])
+    masks = _token_masks(tokens, strings)
+
+    doc_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    if by == "doc":
+        # reduceat cannot express empty segments: aggregate non-empty docs only
+        nonempty = lengths > 0
+        starts = doc_starts[nonempty]
+        out = {}
+        for name in FEATURES:
+            counts = np.zeros(len(docs), dtype=np.int64)
+            if len(starts):
+                counts[nonempty] = np.add.reduceat(masks[name].astype(np.int64), starts)
+            out[name] = counts
+        return out
+
+    if by != "sent":
+        raise ValueError(f"Unknown aggregation level: {by}")
+
+    # Sentence boundaries: every doc start plus every SENT_START token
+    is_start = masks["sent_starts"].copy()
+    is_start[doc_starts[lengths > 0]] = True
+    starts = np.flatnonzero(is_start)
+
+    out = {
+        name: np.add.reduceat(masks[name].astype(np.int64), starts)
+        if len(starts) else np.zeros(0, dtype=np.int64)
+        for name in FEATURES
+    }
+    out["doc_index"] = np.searchsorted(doc_starts, starts, side="right") - 1
+    return out
+
+
+def doc_features(doc) -> dict[str, int]:
+    """
+    Aggregates for a single doc, as plain ints.
+    """
+
+    feats = batch_features([doc])
+    return {name: int(feats[name][0]) for name in FEATURES}
+
+
+def feature_row(feats: dict[str, np.ndarray], i: int) -> dict[str, int]:
+    """
+    Row `i` of a batch_features result, as plain ints.
+    """
+
+    return {name: int(feats[name][i]) for name in FEATURES}
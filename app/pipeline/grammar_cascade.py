@@ -0,0 +1,129 @@
+# app/pipeline/grammar_cascade.py
+
+import re
+from nlp import get_tagger
+
+# Must stay in sync with the triggers in grammar_rules / grammar_spacy /
+# usage_clarity: a sentence is only skipped if none of them can fire.
+_WHITESPACE = re.compile(r"\s+[,.!?]")
+_TIME_MARKER = re.compile(r"\b(yesterday|last|ago|previous)\b")
+_SUBORDINATORS = {"while", "although", "because", "if", "when"}
+_DO_FORMS = {"do", "does", "did"}
+_NP_MODIFIERS = {"ADJ", "NOUN", "PROPN", "NUM", "ADV"}
+# Only tags that grammar_rules' article check accepts (a "det" dependent):
+# possessives and numerals are not, so "my book" must still be flagged
+_DETERMINER_TAGS = {"DT", "PDT"}
+_SAFE_NOUNS = {
+    # grammar_rules MASS_NOUNS + ZERO_ARTICLE_PLACES
+    "oxygen", "sodium", "water", "air", "information",
+    "school", "college", "university",
+    "bed", "work", "church", "hospital", "home",
+}
+
+
+def screen_sentence(sentence: str) -> dict:
+    """
+    Cascade tier 1: cheap checks (regex + tagger-only POS) that decide
+    whether a sentence needs the full dependency-based analysis.
+
+    Returns {"grammar": bool, "usage": bool, "reasons": [...]}; False means
+    the full rules cannot find anything in that sentence, so they are
+    skipped. The checks deliberately over-flag.
+    """
+
+    reasons = []
+
+    if not sentence:
+        return {"grammar": False, "usage": False, "reasons": reasons}
+
+    lower = sentence.lower()
+
+    # regex: whitespace before punctuation, lowercase start
+    if _WHITESPACE.search(sentence):
+        reasons.append("whitespace")
+    if sentence[0].islower():
+        reasons.append("capitalization")
+
+    tokens = list(get_tagger()(sentence))
+
+    verb_idx = [i for i, t in enumerate(tokens) if t.pos_ in ("VERB", "AUX")]
+    has_cconj = any(t.pos_ == "CCONJ" for t in tokens)
+
+    # missing verb / fragment
+    if not verb_idx:
+        reasons.append("no_verb")
+    # missing subject: no nominal before the first verb. Existential
+    # "there" / wh-words are not candidates: the parser labels "there" expl,
+    # not nsubj, so the full rules flag such sentences
+    elif not any(
+        t.pos_ in ("NOUN", "PROPN", "PRON", "NUM") and t.tag_ not in ("EX", "WDT", "WP")
+        for t in tokens[:verb_idx[0]]
+    ):
+        reasons.append("no_subject_candidate")
+
+    # run-on: several verbs (multiple ROOTs / dense verbs without cc)
+    if len(verb_idx) >= 3 or (len(verb_idx) >= 2 and not has_cconj):
+        reasons.append("verb_density")
+
+    # dangling subordinate clause
+    if any(t.lower_ in _SUBORDINATORS for t in tokens):
+        reasons.append("subordinator")
+
+    # aux + non-base verb (doesn't has / did went)
+    for i, t in enumerate(tokens):
+        if t.lower_ in _DO_FORMS and t.pos_ == "AUX":
+            j = i + 1
+            while j < len(tokens) and tokens[j].pos_ == "PART":
+                j += 1
+            if j < len(tokens) and tokens[j].tag_ != "VB":
+                reasons.append("aux_verb")
+                break
+
+    # singular count noun without a determiner in its noun phrase
+    for i, t in enumerate(tokens):
+        if t.tag_ != "NN" or not t.text.islower() or t.lower_ in _SAFE_NOUNS:
+            continue
+        j = i - 1
+        while j >= 0 and tokens[j].pos_ in _NP_MODIFIERS:
+            j -= 1
+        if j < 0 or tokens[j].tag_ not in _DETERMINER_TAGS:
+            reasons.append("bare_noun")
+            break
+
+    # comparative after "the"
+    if any(
+        t.tag_ == "JJR" and i > 0 and tokens[i - 1].lower_ == "the"
+        for i, t in enumerate(tokens)
+    ):
+        reasons.append("comparison")
+
+    # "their" after a singular noun
+    for i, t in enumerate(tokens):
+        if t.lower_ == "their" and any(p.tag_ == "NN" for p in tokens[:i]):
+            reasons.append("pronoun_agreement")
+            break
+
+    # time marker (tense heuristic)
+    time_marker = bool(_TIME_MARKER.search(lower))
+    if time_marker:
+        reasons.append("time_marker")
+
+    # clause overload
+    if len(tokens) > 35:
+        reasons.append("long_sentence")
+
+    grammar = bool(reasons)
+
+    # usage/clarity triggers: past BE with a plural nominal, or
+    # "to + VERB ... need/require"
+    usage = (
+        not time_marker
+        and any(t.tag_ == "VBD" and t.lower_ in ("was", "were") for t in tokens)
+        and any(t.tag_ in ("NNS", "NNPS") for t in tokens)
+    ) or (
+        " to " in f" {lower} "
+        # Every inflection of the lemmas usage_clarity checks (need, require)
+        and re.search(r"\b(need|requir)\w*\b", lower) is not None
+    )
+
+    return {"grammar": grammar, "usage": usage, "reasons": reasons}
@@ -1,4 +1,20 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+from config import (
+    DEADLINE_EXPLAIN_MIN_MS,
+    EXPLAIN_INDEX,
+    LLM_EXPLAIN_CHUNK_ITEMS,
+    LLM_EXPLAIN_CONCURRENCY,
+    LLM_EXPLAIN_RETRIES,
+)
+from deadline import Deadline
 from llm.router import LLMRouter
+from pipeline.analyze import STRUCTURAL_ERRORS
+from pipeline.explain_index import explanation_index
+from pipeline.explain_prompt import build_explanation_prompt, dedup_items
+from scheduler import current_priority, llm_scheduler
+from utils.json_stream import IncrementalErrorsParser
 import json
 
 _llm = LLMRouter()
@@ -47,48 +63,323 @@ Output ONLY valid JSON in this exact format:
 """.strip()
 
 
-def explain_grammar_errors(summary: str, detected_errors: dict) -> dict:
+def llm_stats() -> dict:
+    """
+    Routing state of the shared LLM router (ranking, per-backend stats),
+    plus explanation retrieval hit rate.
+    """
+    return {**_llm.snapshot(), "explanation_index": explanation_index.snapshot()}
+
+
+def _clean_error(err: dict, explanation_items: list[dict]) -> dict | None:
+    """
+    🔒 HARD SAFETY: enforce allowed error types.
+    Unknown types fall back to the type of the matching input span.
+    """
+
+    if err.get("type") in ALLOWED_ERROR_TYPES:
+        return err
+
+    # fallback: reuse original type
+    for src in explanation_items:
+        if src["text_span"] == err.get("text_span"):
+            err["type"] = src["type"]
+            return err
+
+    return None
+
+
+def _indexed(err_type: str) -> bool:
+    # Sentence-level spans are whole sentences: a similar sentence does not
+    # have the same fault, so their explanations are never reused
+    return EXPLAIN_INDEX and err_type not in STRUCTURAL_ERRORS
+
+
+def _retrieve(items: list[dict]) -> tuple[list[dict], list[dict]]:
+    """
+    Splits items into (explanations reused from the retrieval index,
+    items that still need the LLM).
+    """
+
+    if not EXPLAIN_INDEX:
+        return [], items
+
+    found, remaining = [], []
+    for item in items:
+        hit = _indexed(item["type"]) and explanation_index.lookup(
+            item["type"], item["text_span"]
+        )
+        if hit:
+            found.append({
+                "type": item["type"],
+                "text_span": item["text_span"],
+                "description": hit["description"],
+            })
+        else:
+            remaining.append(item)
+    return found, remaining
+
+
+def _learn(err: dict, explanation_items: list[dict]) -> None:
+    # Index only explanations of spans we actually sent
+    if _indexed(err.get("type")) and any(
+        src["type"] == err.get("type") and src["text_span"] == err.get("text_span")
+        for src in explanation_items
+    ):
+        explanation_index.add(err["type"], err["text_span"], err.get("description", ""))
+
+
+def _parse_explanations(raw: str, explanation_items: list[dict]) -> list[dict]:
+    """
+    Parse the LLM JSON answer. Raises on malformed output.
+    """
+
+    raw = raw.strip()
+    if not raw.startswith("{"):
+        raw = raw[raw.find("{"):]
+
+    data = json.loads(raw)
+
+    cleaned = []
+    for err in data.get("errors", []):
+        err = _clean_error(err, explanation_items)
+        if err:
+            cleaned.append(err)
+
+    return cleaned
+
+
+def _out_of_time(deadline: Deadline | None) -> bool:
+    return deadline is not None and not deadline.allows(DEADLINE_EXPLAIN_MIN_MS)
+
+
+def _explain_chunk(
+    items: list[dict],
+    sentences: list[str],
+    priority: str,
+    deadline: Deadline | None = None,
+) -> tuple[list[dict], dict]:
+    """
+    One LLM call for a chunk of items, retried up to LLM_EXPLAIN_RETRIES
+    times. A chunk that still fails degrades to no explanations on its own.
+    Each attempt waits for an LLM slot in the request's priority class.
+
+    With a deadline, the wait for the slot and each call's timeout are
+    bounded by the time left, and no attempt starts with less than
+    DEADLINE_EXPLAIN_MIN_MS left.
+    """
+
+    built = build_explanation_prompt(SYSTEM_PROMPT, items, sentences)
+
+    usage = {
+        "estimated_prompt_tokens": built["estimated_tokens"],
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "items_sent": len(built["items"]),
+        "items_dropped": built["dropped"],
+        "chunks": 1,
+        "chunks_failed": 0,
+        "chunks_timed_out": 0,
+    }
+
+    for _ in range(1 + LLM_EXPLAIN_RETRIES):
+        if _out_of_time(deadline):
+            break
+        try:
+            with llm_scheduler.slot(
+                priority, timeout=deadline.remaining() if deadline else None
+            ):
+                timeout = deadline.remaining() if deadline else None
+                raw, llm_usage = _llm.complete(
+                    SYSTEM_PROMPT, built["prompt"], timeout=timeout
+                )
+            usage["prompt_tokens"] += llm_usage.get("prompt_tokens", 0)
+            usage["completion_tokens"] += llm_usage.get("completion_tokens", 0)
+            errors = _parse_explanations(raw, built["items"])
+            for err in errors:
+                _learn(err, built["items"])
+            return errors, usage
+        except Exception:
+            continue
+
+    usage["chunks_failed"] = 1
+    usage["chunks_timed_out"] = int(_out_of_time(deadline))
+    return [], usage
+
+
+def _chunk_items(
+    summary: str, detected_errors: dict
+) -> tuple[list[list[dict]], list[str], list[dict], list[dict]]:
+    """
+    Returns (chunks of items for the LLM, context sentences, explanations
+    already found in the retrieval index, all deduplicated items in order).
+    """
+    items = dedup_items(detected_errors.get("_items", []))
+    retrieved, explanation_items = _retrieve(items)
+    sentences = detected_errors.get("_sentences") or [summary]
+    chunks = [
+        explanation_items[i:i + LLM_EXPLAIN_CHUNK_ITEMS]
+        for i in range(0, len(explanation_items), LLM_EXPLAIN_CHUNK_ITEMS)
+    ]
+    return chunks, sentences, retrieved, items
+
+
+def _in_item_order(errors: list[dict], items: list[dict]) -> list[dict]:
+    """
+    Sorts explanations by the position of their (type, text_span) among
+    `items` (span alone if the LLM changed the type); unmatched ones go
+    last. Stable, so several explanations of one item keep their order.
+    """
+    by_key, by_span = {}, {}
+    for n, item in enumerate(items):
+        by_key.setdefault((item["type"], item["text_span"]), n)
+        by_span.setdefault(item["text_span"], n)
+
+    def rank(err: dict) -> int:
+        key = (err.get("type"), err.get("text_span"))
+        return by_key.get(key, by_span.get(key[1], len(items)))
+
+    return sorted(errors, key=rank)
+
+
+def explain_grammar_errors(
+    summary: str, detected_errors: dict, deadline: Deadline | None = None
+) -> dict:
     """
     STEP 5: LLM-based grammar explanation.
     LLM EXPLAINS ONLY — never classifies or renames errors.
+
+    detected_errors:
+    - "_items":     [{"type", "text_span"}, ...] to explain
+    - "_sentences": sentences containing errors, sent as context
+                    (falls back to the whole summary)
+
+    Items are split into chunks of LLM_EXPLAIN_CHUNK_ITEMS, explained by up
+    to LLM_EXPLAIN_CONCURRENCY parallel calls (a single chunk runs inline)
+    and merged, with the retrieved explanations, in input item order. The per-request threads only bound this request's
+    fan-out: the global limit, priority and deadline are applied by
+    llm_scheduler, which every call waits on. Each
+    prompt is built by build_explanation_prompt (dedup, compact JSON, token
+    budget). "usage" sums estimated and actual token counts over chunks.
+
+    Items whose span is close enough to an already explained one (see
+    ExplanationIndex) reuse that explanation and are not sent;
+    "usage.items_retrieved" counts them.
+
+    With a `deadline`, chunks given up for lack of time are counted in
+    "usage.chunks_timed_out" and recorded as "explanation:partial".
     """
 
-    explanation_items = detected_errors.get("_items", [])
-    if not explanation_items:
+    chunks, sentences, retrieved, items = _chunk_items(summary, detected_errors)
+    if not chunks and not retrieved:
         return {"errors": []}
 
-    user_prompt = f"""
-Student summary:
-{summary}
+    # Pool threads do not inherit the request context: pass the class along
+    priority = current_priority.get()
 
-Explain the following grammar errors.
-You MUST keep the error type unchanged.
+    if not chunks:
+        results = []
+    elif len(chunks) == 1:
+        results = [_explain_chunk(chunks[0], sentences, priority, deadline)]
+    else:
+        workers = min(LLM_EXPLAIN_CONCURRENCY, len(chunks))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="explain") as pool:
+            results = list(pool.map(
+                lambda chunk: _explain_chunk(chunk, sentences, priority, deadline), chunks
+            ))
 
-Errors to explain:
-{json.dumps(explanation_items, indent=2)}
-""".strip()
+    errors = list(retrieved)
+    usage = {
+        "estimated_prompt_tokens": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "items_sent": 0,
+        "items_dropped": 0,
+        "items_retrieved": len(retrieved),
+        "chunks": 0,
+        "chunks_failed": 0,
+        "chunks_timed_out": 0,
+    }
+    for chunk_errors, chunk_usage in results:
+        errors.extend(chunk_errors)
+        for k, v in chunk_usage.items():
+            usage[k] = usage.get(k, 0) + v
+
+    if deadline is not None and usage["chunks_timed_out"]:
+        deadline.skip("explanation:partial")
+
+    return {"errors": _in_item_order(errors, items), "usage": usage}
+
+
+async def astream_grammar_explanations(
+    summary: str, detected_errors: dict, deadline: Deadline | None = None
+) -> AsyncIterator[dict]:
+    """
+    Streaming STEP 5: yields each explanation as soon as the LLM has
+    finished generating it, instead of waiting for the whole answer.
 
+    Chunks are streamed concurrently (LLM_EXPLAIN_CONCURRENCY), so
+    explanations arrive in completion order, not input order. A chunk that
+    fails or ends before yielding anything (empty / malformed JSON) is
+    retried; once it has yielded, a failure just ends that chunk. Explanations from the retrieval index
+    are yielded first.
+
+    With a `deadline`, every chunk's stream is cut when it expires and
+    "explanation:partial" is recorded.
+    """
+
+    chunks, sentences, retrieved, _ = _chunk_items(summary, detected_errors)
+    for err in retrieved:
+        yield err
+    if not chunks:
+        return
+
+    queue = asyncio.Queue()
+    sem = asyncio.Semaphore(LLM_EXPLAIN_CONCURRENCY)
+
+    async def run(chunk: list[dict]):
+        built = build_explanation_prompt(SYSTEM_PROMPT, chunk, sentences)
+        async with sem:
+            for _ in range(1 + LLM_EXPLAIN_RETRIES):
+                if _out_of_time(deadline):
+                    deadline.skip("explanation:partial")
+                    return
+                parser = IncrementalErrorsParser()
+                try:
+                    async with llm_scheduler.aslot(
+                        timeout=deadline.remaining() if deadline else None
+                    ), asyncio.timeout(deadline.remaining() if deadline else None):
+                        timeout = deadline.remaining() if deadline else None
+                        async for delta in _llm.astream(
+                            SYSTEM_PROMPT, built["prompt"], timeout
+                        ):
+                            for err in parser.feed(delta):
+                                err = _clean_error(err, built["items"])
+                                if err:
+                                    _learn(err, built["items"])
+                                    await queue.put(err)
+                    # Empty or malformed answer: retry, like _explain_chunk
+                    if parser.parsed:
+                        return
+                except Exception:
+                    if deadline is not None and not deadline.remaining():
+                        deadline.skip("explanation:partial")
+                        return
+                    if parser.parsed:
+                        return
+
+    async def run_all():
+        try:
+            await asyncio.gather(*(run(c) for c in chunks))
+        finally:
+            await queue.put(None)
+
+    producer = asyncio.create_task(run_all())
     try:
-        raw = _llm.chat(SYSTEM_PROMPT, user_prompt).strip()
-        if not raw.startswith("{"):
-            raw = raw[raw.find("{"):]
-
-        data = json.loads(raw)
-
-        # 🔒 HARD SAFETY: enforce allowed error types
-        cleaned = []
-        for err in data.get("errors", []):
-            if err.get("type") in ALLOWED_ERROR_TYPES:
-                cleaned.append(err)
-            else:
-                # fallback: reuse original type
-                for src in explanation_items:
-                    if src["text_span"] == err.get("text_span"):
-                        err["type"] = src["type"]
-                        cleaned.append(err)
-                        break
-
-        return {"errors": cleaned}
-
-    except Exception:
-        return {"errors": []}
+        while True:
+            err = await queue.get()
+            if err is None:
+                break
+            yield err
+    finally:
+        producer.cancel()
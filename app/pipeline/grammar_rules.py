@@ -1,5 +1,6 @@
 import re
-from nlp import get_nlp
+from nlp import parse_one
+from pipeline.features import doc_features
 
 # ----------------------------
 # Helper: clause splitter
@@ -22,9 +23,12 @@ def _split_clauses(doc):
     return clauses
 
 
-def analyze_grammar_rules(sentence: str) -> dict:
+def analyze_grammar_rules(sentence: str, doc=None, features: dict | None = None) -> dict:
     """
     STEP 3: Rule-based grammar error detection (ROBUST, PTE-aligned).
+
+    `doc` / `features` may be passed in when the sentence was already
+    parsed (and aggregated by pipeline.features) as part of a batch.
     """
 
     errors = {
@@ -60,7 +64,10 @@ def analyze_grammar_rules(sentence: str) -> dict:
     if not sentence:
         return errors
 
-    doc = get_nlp()(sentence)
+    if doc is None:
+        doc = parse_one(sentence)
+    if features is None:
+        features = doc_features(doc)
     tokens = list(doc)
 
     # ----------------------------
@@ -80,8 +87,8 @@ def analyze_grammar_rules(sentence: str) -> dict:
     # ----------------------------
     # 3. Sentence structure
     # ----------------------------
-    has_subject = any(t.dep_ in ("nsubj", "nsubjpass") for t in tokens)
-    has_verb = any(t.pos_ in ("VERB", "AUX") for t in tokens)
+    has_subject = features["subjects"] > 0
+    has_verb = features["verbs_aux"] > 0
 
     if not has_subject:
         errors["missing_subject"] += 1
@@ -176,10 +183,8 @@ def analyze_grammar_rules(sentence: str) -> dict:
     # ----------------------------
     # 9. Clause overload
     # ----------------------------
-    if len(tokens) > 35:
-        conj_count = sum(
-            1 for t in tokens if t.text.lower() in ("and", "but", "which", "that")
-        )
+    if features["tokens"] > 35:
+        conj_count = features["clause_words"]  # and / but / which / that
         if conj_count >= 3:
             errors["clause_overload"] += 1
             errors["clause_overload_spans"].append(sentence)
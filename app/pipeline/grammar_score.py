@@ -1,3 +1,45 @@
+# -------------------------------------------------
+# Error severity buckets (UPDATED to match pipeline)
+# -------------------------------------------------
+
+CRITICAL = {
+    "missing_subject",
+    "missing_verb",
+    "fragment",
+    "run_on",
+}
+
+MAJOR = {
+    "aux_verb_error",
+    "tense_error",
+    "comparison_error",
+    "pronoun_agreement_error",
+}
+
+MINOR = {
+    "article_error",
+    "capitalization_error",
+    "conjunction_missing",
+    "clause_overload",
+    "whitespace_error",
+}
+
+
+def classify_sentence(res: dict) -> str | None:
+    """
+    Sentence-level classification: "critical", "major", "minor" or None.
+    The most severe bucket with a non-zero count wins.
+    """
+
+    if any(res.get(k, 0) > 0 for k in CRITICAL):
+        return "critical"
+    if any(res.get(k, 0) > 0 for k in MAJOR):
+        return "major"
+    if any(res.get(k, 0) > 0 for k in MINOR):
+        return "minor"
+    return None
+
+
 def score_grammar(
     sentence_results: list[dict],
     sentence_count: int,
@@ -15,51 +57,29 @@ def score_grammar(
     if not sentence_results or sentence_count == 0:
         return 0
 
-    # -------------------------------------------------
-    # Error severity buckets (UPDATED to match pipeline)
-    # -------------------------------------------------
+    counts = {"critical": 0, "major": 0, "minor": 0}
 
-    CRITICAL = {
-        "missing_subject",
-        "missing_verb",
-        "fragment",
-        "run_on",
-    }
-
-    MAJOR = {
-        "aux_verb_error",
-        "tense_error",
-        "comparison_error",
-        "pronoun_agreement_error",
-    }
-
-    MINOR = {
-        "article_error",
-        "capitalization_error",
-        "conjunction_missing",
-        "clause_overload",
-        "whitespace_error",
-    }
+    for res in sentence_results:
+        bucket = classify_sentence(res)
+        if bucket:
+            counts[bucket] += 1
 
-    # -------------------------------------------------
-    # Sentence-level classification
-    # -------------------------------------------------
+    return score_from_counts(counts, sentence_count)
 
-    critical_sentences = 0
-    major_sentences = 0
-    minor_sentences = 0
 
-    for res in sentence_results:
-        has_critical = any(res.get(k, 0) > 0 for k in CRITICAL)
-        has_major = any(res.get(k, 0) > 0 for k in MAJOR)
-        has_minor = any(res.get(k, 0) > 0 for k in MINOR)
-
-        if has_critical:
-            critical_sentences += 1
-        elif has_major:
-            major_sentences += 1
-        elif has_minor:
-            minor_sentences += 1
+def score_from_counts(counts: dict, sentence_count: int) -> int:
+    """
+    Grammar score from per-bucket sentence counts.
+
+    Lets long-document mode aggregate `classify_sentence` results
+    incrementally instead of keeping every sentence result in memory.
+    """
+
+    if sentence_count == 0:
+        return 0
+
+    critical_sentences = counts.get("critical", 0)
+    major_sentences = counts.get("major", 0)
 
     # -------------------------------------------------
     # HARD FAILS (PTE behaviour)
@@ -1,39 +1,44 @@
 # app/pipeline/grammar_spacy.py
 
-from nlp import get_nlp
+from nlp import parse_one
+from pipeline.features import doc_features
 
 
-def refine_with_spacy(sentence: str, errors: dict) -> dict:
+def refine_with_spacy(
+    sentence: str, errors: dict, doc=None, features: dict | None = None
+) -> dict:
     """
     STEP 4: spaCy-based structural validation.
     Reinforces and augments rule-based grammar error counts.
+
+    Every check here is a token-attribute count, read from the
+    pipeline.features aggregates (computed from `doc`, or passed in
+    from a batch).
     """
 
     if not sentence:
         return errors
 
-    doc = get_nlp()(sentence)
+    if features is None:
+        features = doc_features(doc if doc is not None else parse_one(sentence))
 
     # --------------------------------------------------
     # ROOT verb check (FIXED)
     # Accept VERB or AUX as valid root
     # --------------------------------------------------
-    roots = [
-        t for t in doc
-        if t.dep_ == "ROOT" and t.pos_ in ("VERB", "AUX")
-    ]
+    roots = features["root_verbs"]
 
     if not roots:
         errors["missing_verb"] += 1
         errors["fragment"] += 1
 
-    if len(roots) > 1:
+    if roots > 1:
         errors["run_on"] += 1
 
     # --------------------------------------------------
     # Subject dependency check
     # --------------------------------------------------
-    has_subject = any(t.dep_ in ("nsubj", "nsubjpass") for t in doc)
+    has_subject = features["subjects"] > 0
     if not has_subject:
         errors["missing_subject"] += 1
         errors["fragment"] += 1
@@ -42,11 +47,8 @@ def refine_with_spacy(sentence: str, errors: dict) -> dict:
     # Verb density vs conjunctions
     # Count VERB + AUX (FIX)
     # --------------------------------------------------
-    verb_count = sum(
-        1 for t in doc
-        if t.pos_ in ("VERB", "AUX")
-    )
-    conj_count = sum(1 for t in doc if t.dep_ == "cc")
+    verb_count = features["verbs_aux"]
+    conj_count = features["cc"]
 
     if verb_count >= 3 and conj_count == 0:
         errors["run_on"] += 1
@@ -54,10 +56,7 @@ def refine_with_spacy(sentence: str, errors: dict) -> dict:
     # --------------------------------------------------
     # Dangling subordinate clause
     # --------------------------------------------------
-    has_subordinator = any(
-        t.text.lower() in ("while", "although", "because", "if", "when")
-        for t in doc
-    )
+    has_subordinator = features["subordinators"] > 0
 
     if has_subordinator and not roots:
         errors["fragment"] += 1
@@ -1,5 +1,12 @@
 # app/pipeline/normalize.py
 
+import re
+from typing import Iterator
+
+# Sentence-final punctuation (optionally closed by quotes/brackets) + whitespace
+_CHUNK_BOUNDARY = re.compile(r"[.!?][\"')\]]*\s")
+
+
 def normalize_text(text: str) -> str:
     """
     STEP 1: Safe text normalization.
@@ -29,3 +36,41 @@ def normalize_text(text: str) -> str:
     text = " ".join(text.split())
 
     return text
+
+
+def iter_normalized_chunks(text: str, max_chars: int) -> Iterator[str]:
+    """
+    Long-document mode: normalize the input as a stream of chunks.
+
+    Each chunk is at most `max_chars` raw characters and is cut after the
+    last sentence-final punctuation in the window (falling back to the last
+    whitespace), so sentences and words are not split across chunks.
+    Joining the chunks with a single space gives `normalize_text(text)`.
+    """
+
+    if not text:
+        return
+
+    pos = 0
+    n = len(text)
+
+    while pos < n:
+        end = min(pos + max_chars, n)
+        cut = end
+
+        if end < n:
+            window = text[pos:end]
+            last = None
+            for last in _CHUNK_BOUNDARY.finditer(window):
+                pass
+            if last is not None:
+                cut = pos + last.end()
+            else:
+                space = max(window.rfind(" "), window.rfind("\n"), window.rfind("\t"))
+                if space > 0:
+                    cut = pos + space + 1
+
+        chunk = normalize_text(text[pos:cut])
+        if chunk:
+            yield chunk
+        pos = cut
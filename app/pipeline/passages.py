@@ -0,0 +1,87 @@
+# app/pipeline/passages.py
+
+import copy
+import json
+import threading
+
+from config import PASSAGES_PATH
+from pipeline.analyze import analyze_batch
+from pipeline.normalize import normalize_text
+from pipeline.segment import segment_sentences
+
+
+class Passage:
+    """
+    A source passage, segmented and analysed once at registration.
+    `analysis` maps each normalized passage sentence to its
+    (grammar errors, usage issues).
+
+    Summaries are segmented as usual; a summary sentence whose text is
+    identical to a passage sentence reuses its analysis. Sentences are
+    analysed one by one, so the reused result is exactly what analysing
+    the summary sentence would give.
+    """
+
+    def __init__(self, prompt_id: str, text: str):
+        self.prompt_id = prompt_id
+        self.text = normalize_text(text)
+
+        sentences = [s["text"] for s in segment_sentences(self.text)]
+        results = analyze_batch(sentences, usage=True, cascade=False)
+        self.analysis = dict(zip(sentences, results))
+
+    def lookup(self, sentence: str, usage: bool = True) -> tuple[dict, list[dict]] | None:
+        hit = self.analysis.get(sentence)
+        if hit is None:
+            return None
+        errors, issues = copy.deepcopy(hit)
+        return errors, issues if usage else []
+
+
+class PassageStore:
+    """
+    Registered source passages by prompt ID (per process).
+    Passages in PASSAGES_PATH (JSON: {prompt_id: passage}) are registered
+    by load(), called at worker startup, so every worker starts with them.
+    A failed load raises and is retried on next use.
+    """
+
+    def __init__(self, path: str | None = None):
+        self._path = path
+        self._passages = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def load(self) -> None:
+        with self._load_lock:
+            if self._loaded:
+                return
+            if self._path:
+                with open(self._path, encoding="utf-8") as f:
+                    for prompt_id, text in json.load(f).items():
+                        self.register(prompt_id, text)
+            self._loaded = True
+
+    def register(self, prompt_id: str, text: str) -> Passage:
+        passage = Passage(prompt_id, text)
+        with self._lock:
+            self._passages[prompt_id] = passage
+        return passage
+
+    def remove(self, prompt_id: str) -> bool:
+        with self._lock:
+            return self._passages.pop(prompt_id, None) is not None
+
+    def get(self, prompt_id: str) -> Passage | None:
+        if not self._loaded:
+            self.load()
+        return self._passages.get(prompt_id)
+
+    def ids(self) -> list[str]:
+        if not self._loaded:
+            self.load()
+        return sorted(self._passages)
+
+
+passages = PassageStore(PASSAGES_PATH)
@@ -0,0 +1,95 @@
+# app/pipeline/projection.py
+
+# Stage -> stages it needs
+STAGE_DEPS = {
+    "normalize": [],
+    "segment": ["normalize"],
+    "grammar_rules": ["segment"],
+    "usage_clarity": ["segment"],
+    "grammar_score": ["grammar_rules"],
+    "explanation": ["grammar_rules"],
+    "spelling": ["normalize"],
+}
+
+# Execution order
+STAGES = list(STAGE_DEPS)
+
+# Requestable field -> stages producing it
+FIELD_STAGES = {
+    "grammar": ["grammar_score", "grammar_rules", "explanation"],
+    "grammar.score": ["grammar_score"],
+    "grammar.details": ["grammar_rules"],
+    "grammar.explanation": ["explanation"],
+    "usage_clarity": ["usage_clarity"],
+    "usage_clarity.issues": ["usage_clarity"],
+    "spelling": ["spelling"],
+    "spelling.total_words": ["spelling"],
+    "spelling.misspelled_count": ["spelling"],
+    "spelling.misspelled_words": ["spelling"],
+    "spelling.spelling_score": ["spelling"],
+}
+
+# Response metadata returned whatever the projection
+ALWAYS_KEPT = ["stages", "degradation", "deadline", "passage", "long_document"]
+
+
+def parse_fields(fields: str | None) -> list[str] | None:
+    """
+    "grammar.score,spelling" -> ["grammar.score", "spelling"].
+    None / empty means every field. Raises ValueError on unknown fields.
+    """
+
+    if not fields:
+        return None
+
+    parsed = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in parsed if f not in FIELD_STAGES]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. "
+            f"Allowed: {', '.join(FIELD_STAGES)}"
+        )
+    return parsed or None
+
+
+def required_stages(fields: list[str] | None) -> set[str]:
+    """
+    Stages needed for `fields`: the stages producing them plus,
+    transitively, everything those depend on.
+    """
+
+    if fields is None:
+        return set(STAGES)
+
+    needed = set()
+    pending = [stage for f in fields for stage in FIELD_STAGES[f]]
+    while pending:
+        stage = pending.pop()
+        if stage not in needed:
+            needed.add(stage)
+            pending.extend(STAGE_DEPS[stage])
+    return needed
+
+
+def project(response: dict, fields: list[str] | None) -> dict:
+    """
+    Keeps only the requested fields (plus ALWAYS_KEPT metadata).
+    """
+
+    if fields is None:
+        return response
+
+    out = {}
+    for field in fields:
+        top, _, sub = field.partition(".")
+        if top not in response:
+            continue
+        if not sub:
+            out[top] = response[top]
+        elif sub in response[top]:
+            out.setdefault(top, {})[sub] = response[top][sub]
+
+    for key in ALWAYS_KEPT:
+        if key in response:
+            out[key] = response[key]
+    return out
@@ -1,9 +1,13 @@
 # app/pipeline/segment.py
 
-from nlp import get_nlp
+from typing import Iterable, Iterator
 
+from config import SEGMENT_MODE
+from nlp import get_segmenter, parse_one
+from pipeline.features import doc_features
 
-def segment_sentences(text: str) -> list[dict]:
+
+def segment_sentences(text: str, mode: str | None = None) -> list[dict]:
     """
     STEP 2: Sentence segmentation.
 
@@ -11,12 +15,17 @@ def segment_sentences(text: str) -> list[dict]:
     - Use spaCy sentence boundaries when punctuation exists.
     - If multiple clauses without punctuation (run-on), treat as ONE sentence attempt.
     - Mixed cases allowed: some clean sentences, some run-ons.
+
+    `mode` selects the boundary detector (see nlp.get_segmenter).
+    Defaults to config.SEGMENT_MODE.
     """
 
     if not text:
         return []
 
-    doc = get_nlp()(text)
+    mode = mode or SEGMENT_MODE
+    # The full pipeline is pooled: never run the shared instance directly
+    doc = parse_one(text) if mode == "parser" else get_segmenter(mode)(text)
 
     # spaCy-proposed sentences
     spacy_sents = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
@@ -29,8 +38,9 @@ def segment_sentences(text: str) -> list[dict]:
         }]
 
     # Detect run-on: many verbs, few punctuation marks
-    verb_count = sum(1 for t in doc if t.pos_ == "VERB")
-    punct_count = sum(1 for t in doc if t.text in {".", "!", "?"})
+    features = doc_features(doc)
+    verb_count = features["verbs"]
+    punct_count = features["sent_punct"]
 
     if punct_count == 0 and verb_count >= 2:
         # Force single run-on sentence
@@ -48,3 +58,15 @@ def segment_sentences(text: str) -> list[dict]:
         })
 
     return results
+
+
+def iter_sentences(chunks: Iterable[str], mode: str | None = None) -> Iterator[dict]:
+    """
+    Long-document mode: segment a stream of normalized chunks.
+
+    Each chunk is segmented on its own, so only one chunk-sized Doc
+    is alive at a time. Yields the same dicts as `segment_sentences`.
+    """
+
+    for chunk in chunks:
+        yield from segment_sentences(chunk, mode)
@@ -1,11 +1,54 @@
 # app/pipeline/spelling.py
 
 import re
+from functools import lru_cache
+from typing import Iterable
+
 from spellchecker import SpellChecker
 
+from config import SPELL_CACHE_SIZE
+
 _spell = SpellChecker()
 
 
+def _tokenize(text: str) -> list[str]:
+    # Extract alphabetic tokens only
+    return [w.lower() for w in re.findall(r"\b[a-zA-Z]+\b", text)]
+
+
+@lru_cache(maxsize=SPELL_CACHE_SIZE)
+def _is_misspelled(word: str) -> bool:
+    # Verdict per distinct word; bounded, so typo-heavy traffic can't grow it
+    return bool(_spell.unknown([word]))
+
+
+def _misspelled(words: Iterable[str]) -> set[str]:
+    return {w for w in set(words) if _is_misspelled(w)}
+
+
+def _score(misspelled_count: int) -> int:
+    # PTE-style score mapping
+    if misspelled_count == 0:
+        return 4
+    elif misspelled_count <= 2:
+        return 3
+    elif misspelled_count <= 5:
+        return 2
+    elif misspelled_count <= 9:
+        return 1
+    return 0
+
+
+def _result(total_words: int, misspelled: set[str]) -> dict:
+    misspelled_words = sorted(misspelled)
+    return {
+        "total_words": total_words,
+        "misspelled_count": len(misspelled_words),
+        "misspelled_words": misspelled_words,
+        "spelling_score": _score(len(misspelled_words)),
+    }
+
+
 def evaluate_spelling(text: str) -> dict:
     """
     Spelling evaluation (PTE-style).
@@ -17,47 +60,46 @@ def evaluate_spelling(text: str) -> dict:
     """
 
     if not text:
-        return {
-            "total_words": 0,
-            "misspelled_count": 0,
-            "misspelled_words": [],
-            "spelling_score": 4,
-        }
+        return _result(0, set())
 
-    # Extract alphabetic tokens only
-    words = re.findall(r"\b[a-zA-Z]+\b", text)
-    lower_words = [w.lower() for w in words]
- 
+    lower_words = _tokenize(text)
 
     if not lower_words:
-        return {
-            "total_words": 0,
-            "misspelled_count": 0,
-            "misspelled_words": [],
-            "spelling_score": 4,
-        }
+        return _result(0, set())
 
-    misspelled = _spell.unknown(lower_words)
+    return _result(len(lower_words), _misspelled(lower_words))
 
-    misspelled_words = sorted(misspelled)
-    misspelled_count = len(misspelled_words)
-    total_words = len(lower_words)
 
-    # PTE-style score mapping
-    if misspelled_count == 0:
-        score = 4
-    elif misspelled_count <= 2:
-        score = 3
-    elif misspelled_count <= 5:
-        score = 2
-    elif misspelled_count <= 9:
-        score = 1
-    else:
-        score = 0
+def evaluate_spelling_batch(texts: list[str]) -> list[dict]:
+    """
+    `evaluate_spelling` for many documents at once (e.g. a cohort on the
+    same prompt). Words are deduplicated across the whole batch, each
+    distinct word is looked up once, and the verdicts mapped back to
+    every document.
+    """
 
-    return {
-        "total_words": total_words,
-        "misspelled_count": misspelled_count,
-        "misspelled_words": misspelled_words,
-        "spelling_score": score,
-    }
+    tokenized = [_tokenize(text) if text else [] for text in texts]
+
+    distinct = set()
+    for words in tokenized:
+        distinct.update(words)
+    misspelled = _spell.unknown(distinct)
+
+    return [_result(len(words), misspelled.intersection(words)) for words in tokenized]
+
+
+def evaluate_spelling_stream(chunks: Iterable[str]) -> dict:
+    """
+    Long-document mode: same result as `evaluate_spelling` on the joined
+    text, but only one chunk's tokens are held in memory at a time.
+    """
+
+    total_words = 0
+    misspelled = set()
+
+    for chunk in chunks:
+        lower_words = _tokenize(chunk)
+        total_words += len(lower_words)
+        misspelled |= _misspelled(lower_words)
+
+    return _result(total_words, misspelled)
@@ -1,13 +1,15 @@
 import re
-from nlp import get_nlp
+from nlp import parse_one
 
 
-def analyze_usage_clarity(sentence: str) -> dict:
+def analyze_usage_clarity(sentence: str, doc=None) -> dict:
     """
     Usage / clarity diagnostics (NON-GRAMMAR).
     - No scoring
     - No penalties
     - Heuristic only
+
+    `doc` may be passed in when the sentence is already parsed.
     """
 
     issues = []
@@ -15,7 +17,8 @@ def analyze_usage_clarity(sentence: str) -> dict:
     if not sentence:
         return {"issues": []}
 
-    doc = get_nlp()(sentence)
+    if doc is None:
+        doc = parse_one(sentence)
     tokens = list(doc)
 
     # ----------------------------
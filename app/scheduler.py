@@ -0,0 +1,213 @@
+import asyncio
+import collections
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+
+from config import SCHED_CPU_SLOTS, SCHED_LLM_SLOTS, SCHED_WEIGHTS
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Priority class of the request being served (set by the API layer)
+current_priority = contextvars.ContextVar("current_priority", default=INTERACTIVE)
+
+DEFAULT_WEIGHTS = {INTERACTIVE: 8.0, BULK: 1.0}
+
+
+def _validate_weights(weights: dict) -> dict:
+    """
+    SCHED_WEIGHTS -> weights per class, normalised to lower case. Classes
+    the endpoints use but the setting omits keep their default weight, so
+    a partial override (e.g. "bulk=2") cannot leave a class unschedulable.
+    """
+    merged = {**DEFAULT_WEIGHTS, **{k.strip().lower(): v for k, v in weights.items()}}
+    bad = {k: v for k, v in merged.items() if not k or not v > 0}
+    if bad:
+        raise ValueError(f"SCHED_WEIGHTS: weights must be positive, got {bad}")
+    return merged
+
+
+WEIGHTS = _validate_weights(SCHED_WEIGHTS)
+
+
+def resolve_priority(value: str | None) -> str:
+    """
+    Header / endpoint value -> known priority class (default interactive).
+    """
+    value = (value or "").strip().lower()
+    return value if value in WEIGHTS else INTERACTIVE
+
+
+class _ClassStats:
+    WINDOW = 500
+
+    def __init__(self):
+        self.queued = 0
+        self.in_service = 0
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent = collections.deque(maxlen=self.WINDOW)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.recent)
+
+        def pct(p):
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+        return {
+            "queue_depth": self.queued,
+            "in_service": self.in_service,
+            "admitted": self.admitted,
+            "mean_wait_ms": self.total_wait / self.admitted * 1000 if self.admitted else 0.0,
+            "p50_wait_ms": pct(50),
+            "p95_wait_ms": pct(95),
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+class WeightedFairScheduler:
+    """
+    Weighted fair queueing of work onto a fixed number of slots.
+
+    Each waiter gets a virtual finish tag
+        tag = max(virtual_time, last_tag[class]) + 1 / weight[class]
+    and free slots go to the smallest tag, so under contention each class
+    receives slots in proportion to its weight, and a class with an
+    empty queue does not bank credit. Threads use slot(), async tasks
+    aslot(); both share one queue. With a `timeout` (seconds), a waiter
+    not granted a slot in time leaves the queue and gets TimeoutError.
+    """
+
+    def __init__(self, name: str, slots: int, weights: dict):
+        self.name = name
+        self.slots = slots
+        self.weights = weights
+
+        self._cond = threading.Condition()
+        self._free = slots
+        self._heap = []
+        self._seq = itertools.count()
+        self._vtime = 0.0
+        self._last_tag = {c: 0.0 for c in weights}
+        self._stats = {c: _ClassStats() for c in weights}
+
+    # ---------------------------------------------
+    # Core (call with _cond held)
+    # ---------------------------------------------
+
+    def _enqueue(self, cls: str, event=None) -> dict:
+        tag = max(self._vtime, self._last_tag[cls]) + 1 / self.weights[cls]
+        self._last_tag[cls] = tag
+        waiter = {
+            "cls": cls,
+            "granted": False,
+            "cancelled": False,
+            "enqueued": time.monotonic(),
+            "event": event,
+        }
+        heapq.heappush(self._heap, (tag, next(self._seq), waiter))
+        self._stats[cls].queued += 1
+        return waiter
+
+    def _dispatch(self) -> None:
+        while self._free > 0 and self._heap:
+            tag, _, waiter = heapq.heappop(self._heap)
+            if waiter["cancelled"]:
+                continue
+            self._vtime = tag
+            self._free -= 1
+            waiter["granted"] = True
+
+            stats = self._stats[waiter["cls"]]
+            wait = time.monotonic() - waiter["enqueued"]
+            stats.queued -= 1
+            stats.in_service += 1
+            stats.admitted += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+            stats.recent.append(wait)
+
+            if waiter["event"] is not None:
+                loop, event = waiter["event"]
+                loop.call_soon_threadsafe(event.set)
+        self._cond.notify_all()
+
+    def _cancel(self, waiter: dict) -> bool:
+        """Drop a waiter from the queue; False if it was granted meanwhile."""
+        with self._cond:
+            if waiter["granted"]:
+                return False
+            waiter["cancelled"] = True
+            self._stats[waiter["cls"]].queued -= 1
+            return True
+
+    def _release(self, cls: str) -> None:
+        with self._cond:
+            self._free += 1
+            self._stats[cls].in_service -= 1
+            self._dispatch()
+
+    # ---------------------------------------------
+    # Public API
+    # ---------------------------------------------
+
+    @contextlib.contextmanager
+    def slot(self, cls: str | None = None, timeout: float | None = None):
+        cls = resolve_priority(cls or current_priority.get())
+        expires = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            waiter = self._enqueue(cls)
+            self._dispatch()
+            while not waiter["granted"]:
+                left = None if expires is None else expires - time.monotonic()
+                if left is not None and left <= 0:
+                    self._cancel(waiter)
+                    raise TimeoutError(f"no {self.name} slot within {timeout:.3f}s")
+                self._cond.wait(left)
+        try:
+            yield
+        finally:
+            self._release(cls)
+
+    @contextlib.asynccontextmanager
+    async def aslot(self, cls: str | None = None, timeout: float | None = None):
+        cls = resolve_priority(cls or current_priority.get())
+        event = asyncio.Event()
+        with self._cond:
+            waiter = self._enqueue(cls, (asyncio.get_running_loop(), event))
+            self._dispatch()
+        try:
+            async with asyncio.timeout(timeout):
+                await event.wait()
+        except BaseException:
+            if not self._cancel(waiter):
+                self._release(cls)
+            raise
+        try:
+            yield
+        finally:
+            self._release(cls)
+
+    def queued(self) -> int:
+        """Waiters across all classes."""
+        with self._cond:
+            return sum(s.queued for s in self._stats.values())
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "free": self._free,
+                "classes": {c: s.snapshot() for c, s in self._stats.items()},
+            }
+
+
+cpu_scheduler = WeightedFairScheduler("cpu", SCHED_CPU_SLOTS, WEIGHTS)
+llm_scheduler = WeightedFairScheduler("llm", SCHED_LLM_SLOTS, WEIGHTS)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 
 class GrammarExplanation(BaseModel):
@@ -8,8 +8,21 @@ class GrammarExplanation(BaseModel):
     description: str
 
 
+class ExplanationUsage(BaseModel):
+    estimated_prompt_tokens: int
+    prompt_tokens: int
+    completion_tokens: int
+    items_sent: int
+    items_dropped: int
+    items_retrieved: int = 0
+    chunks: int
+    chunks_failed: int
+    chunks_timed_out: int = 0
+
+
 class GrammarExplanationResponse(BaseModel):
     errors: List[GrammarExplanation]
+    usage: Optional[ExplanationUsage] = None
 
 
 class GrammarResponse(BaseModel):
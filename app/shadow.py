@@ -0,0 +1,177 @@
+import collections
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    SHADOW_CASCADE,
+    SHADOW_MAX_BACKLOG,
+    SHADOW_SAMPLE_RATE,
+    SHADOW_SEGMENT_MODE,
+)
+from pipeline.analyze import analyze_batch
+from pipeline.grammar_score import score_grammar
+from pipeline.normalize import normalize_text
+from pipeline.segment import segment_sentences
+from pipeline.spelling import evaluate_spelling
+from scheduler import BULK, cpu_scheduler
+
+logger = logging.getLogger(__name__)
+
+SPELLING_FIELDS = ["total_words", "misspelled_count", "misspelled_words", "spelling_score"]
+
+
+def run_alternative(
+    summary: str, segment_mode: str, cascade: bool, usage: bool = False
+) -> dict:
+    """
+    Scores-only pipeline run with an alternative configuration.
+    Mirrors the fields compared by `compare`; usage/clarity only runs with
+    `usage`, so the timing covers the same stages as the primary's.
+    """
+
+    normalized = normalize_text(summary)
+    sentences = segment_sentences(normalized, segment_mode)
+    results = analyze_batch([s["text"] for s in sentences], usage=usage, cascade=cascade)
+    details = [errors for errors, _ in results]
+
+    return {
+        "grammar": {
+            "score": score_grammar(details, len(sentences)),
+            "details": details,
+        },
+        "spelling": evaluate_spelling(normalized),
+    }
+
+
+def _counts(errors: dict) -> dict:
+    return {k: v for k, v in errors.items() if isinstance(v, int)}
+
+
+def compare(primary: dict, shadow: dict) -> list[dict]:
+    """
+    Field-by-field differences: grammar score, sentence count, every
+    per-sentence error count, and the spelling fields.
+    """
+
+    diffs = []
+
+    def diff(field, a, b):
+        if a != b:
+            diffs.append({"field": field, "primary": a, "shadow": b})
+
+    diff("grammar.score", primary["grammar"]["score"], shadow["grammar"]["score"])
+
+    p_details = primary["grammar"]["details"]
+    s_details = shadow["grammar"]["details"]
+    diff("grammar.sentence_count", len(p_details), len(s_details))
+
+    for i, (p, s) in enumerate(zip(p_details, s_details)):
+        p, s = _counts(p), _counts(s)
+        for key in sorted(set(p) | set(s)):
+            diff(f"grammar.details[{i}].{key}", p.get(key), s.get(key))
+
+    for key in SPELLING_FIELDS:
+        diff(f"spelling.{key}", primary["spelling"].get(key), shadow["spelling"].get(key))
+
+    return diffs
+
+
+class ShadowRunner:
+    """
+    Re-runs a sampled fraction of live requests through an alternative
+    pipeline configuration, off the request path.
+
+    Work runs on one background thread, in the bulk class of the CPU
+    scheduler, and is dropped when SHADOW_MAX_BACKLOG runs are pending, so
+    shadowing never delays live traffic. Mismatches are logged (logger
+    "shadow") with the input and the differing fields; snapshot() reports
+    match rate and primary vs shadow latency.
+    """
+
+    WINDOW = 1000
+
+    def __init__(self, sample_rate: float, segment_mode: str, cascade: bool):
+        self.sample_rate = sample_rate
+        self.config = {"segment_mode": segment_mode, "cascade": cascade}
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.compared = 0
+        self.mismatched = 0
+        self.dropped = 0
+        self.failed = 0
+        self._latency = collections.deque(maxlen=self.WINDOW)
+
+    def maybe_submit(self, summary: str, primary: dict, primary_ms: float) -> bool:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            if self._pending >= SHADOW_MAX_BACKLOG:
+                self.dropped += 1
+                return False
+            self._pending += 1
+        self._pool.submit(self._run, summary, primary, primary_ms)
+        return True
+
+    def _run(self, summary: str, primary: dict, primary_ms: float) -> None:
+        try:
+            with cpu_scheduler.slot(BULK):
+                t0 = time.perf_counter()
+                shadow = run_alternative(
+                    summary,
+                    **self.config,
+                    usage="usage_clarity" in primary["stages"],
+                )
+                shadow_ms = (time.perf_counter() - t0) * 1000
+            diffs = compare(primary, shadow)
+        except Exception:
+            logger.exception("shadow run failed")
+            with self._lock:
+                self._pending -= 1
+                self.failed += 1
+            return
+
+        with self._lock:
+            self._pending -= 1
+            self.compared += 1
+            self._latency.append((primary_ms, shadow_ms))
+            if diffs:
+                self.mismatched += 1
+
+        if diffs:
+            logger.warning("shadow mismatch %s", json.dumps({
+                "config": self.config,
+                "summary": summary,
+                "diffs": diffs,
+                "primary_ms": round(primary_ms, 2),
+                "shadow_ms": round(shadow_ms, 2),
+            }))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            pairs = list(self._latency)
+            out = {
+                "sample_rate": self.sample_rate,
+                "config": self.config,
+                "pending": self._pending,
+                "compared": self.compared,
+                "mismatched": self.mismatched,
+                "match_rate": 1 - self.mismatched / self.compared if self.compared else None,
+                "dropped": self.dropped,
+                "failed": self.failed,
+            }
+
+        if pairs:
+            deltas = sorted(s - p for p, s in pairs)
+            out["mean_primary_ms"] = sum(p for p, _ in pairs) / len(pairs)
+            out["mean_shadow_ms"] = sum(s for _, s in pairs) / len(pairs)
+            out["p50_delta_ms"] = deltas[len(deltas) // 2]
+            out["p95_delta_ms"] = deltas[min(len(deltas) - 1, int(len(deltas) * 0.95))]
+        return out
+
+
+shadow = ShadowRunner(SHADOW_SAMPLE_RATE, SHADOW_SEGMENT_MODE, SHADOW_CASCADE)
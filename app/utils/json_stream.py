@@ -0,0 +1,65 @@
+# app/utils/json_stream.py
+
+import json
+
+
+class IncrementalErrorsParser:
+    """
+    Incremental parser for streamed LLM output of the form
+    {"errors": [{...}, {...}]}.
+
+    feed() takes raw text deltas and returns every object of the top-level
+    array that was completed by them, as soon as its closing brace arrives.
+    Text before the first "{" (preamble) is ignored; objects that fail to
+    parse are skipped.
+    """
+
+    def __init__(self):
+        self._started = False
+        self._stack = []
+        self._in_str = False
+        self._escape = False
+        self._buf = None
+        self.parsed = 0
+
+    def feed(self, text: str) -> list[dict]:
+        out = []
+
+        for ch in text:
+            if not self._started:
+                if ch != "{":
+                    continue
+                self._started = True
+
+            if self._buf is not None:
+                self._buf.append(ch)
+
+            if self._in_str:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_str = False
+                continue
+
+            if ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                if ch == "{" and self._stack == ["{", "["]:
+                    self._buf = ["{"]
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._buf is not None and self._stack == ["{", "["]:
+                    try:
+                        obj = json.loads("".join(self._buf))
+                    except ValueError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        out.append(obj)
+                        self.parsed += 1
+                    self._buf = None
+
+        return out
@@ -1,8 +1,23 @@
 # app/utils/text.py
 
+import re
+
+
 def safe_lower(text: str) -> str:
     """
     Lowercase helper for internal checks only.
     NEVER use this on user-facing text.
     """
     return text.lower() if text else ""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local BPE token estimate (no tokenizer download needed).
+    English words average ~1.3 tokens; punctuation is ~1 token each.
+    """
+    if not text:
+        return 0
+    words = len(re.findall(r"\w+", text))
+    other = len(re.findall(r"[^\w\s]", text))
+    return int(words * 1.3 + other + 0.5)
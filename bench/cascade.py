@@ -0,0 +1,87 @@
+# bench/cascade.py
+"""
+Cascade benchmark: agreement with the full pipeline and throughput gain.
+
+The full pipeline's output is the label for every sentence. Reports how
+often the cascade reproduces it exactly (per-sentence error counts, usage
+issues, per-document grammar score), how many sentences tier 1 lets skip
+the parser, and sentences/second for both modes.
+
+Usage:
+    python bench/cascade.py [corpus.txt] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from pipeline.analyze import analyze_sentence  # noqa: E402
+from pipeline.grammar_cascade import screen_sentence  # noqa: E402
+from pipeline.grammar_score import score_grammar  # noqa: E402
+from pipeline.normalize import normalize_text  # noqa: E402
+from pipeline.segment import segment_sentences  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+
+def counts(errors: dict) -> dict:
+    return {k: v for k, v in errors.items() if isinstance(v, int)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        docs = [
+            [s["text"] for s in segment_sentences(normalize_text(line))]
+            for line in f if line.strip()
+        ]
+    sentences = [s for doc in docs for s in doc]
+
+    # Agreement
+    same_sentence = same_usage = same_score = skipped = 0
+    disagreements = []
+    for doc in docs:
+        full = [analyze_sentence(s, cascade=False) for s in doc]
+        fast = [analyze_sentence(s, cascade=True) for s in doc]
+        for s, (f_err, f_use), (c_err, c_use) in zip(doc, full, fast):
+            if counts(f_err) == counts(c_err):
+                same_sentence += 1
+            else:
+                disagreements.append((s, screen_sentence(s)["reasons"]))
+            same_usage += f_use == c_use
+            skipped += not screen_sentence(s)["grammar"]
+        if score_grammar([e for e, _ in full], len(doc)) == score_grammar(
+            [e for e, _ in fast], len(doc)
+        ):
+            same_score += 1
+
+    # Throughput
+    rates = {}
+    for mode in (False, True):
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for s in sentences:
+                analyze_sentence(s, cascade=mode)
+        rates[mode] = len(sentences) * args.repeat / (time.perf_counter() - t0)
+
+    n = len(sentences)
+    print(f"sentences            {n} in {len(docs)} documents")
+    print(f"skipped by tier 1    {skipped / n:.1%}")
+    print(f"sentence agreement   {same_sentence / n:.1%}")
+    print(f"usage agreement      {same_usage / n:.1%}")
+    print(f"score agreement      {same_score / len(docs):.1%}")
+    print(f"throughput           {rates[False]:.1f} -> {rates[True]:.1f} sentences/s "
+          f"({rates[True] / rates[False]:.2f}x)")
+    for s, reasons in disagreements:
+        print(f"  differs: {s[:70]!r} tier1={reasons}")
+
+
+if __name__ == "__main__":
+    main()
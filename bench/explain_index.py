@@ -0,0 +1,144 @@
+# bench/explain_index.py
+"""
+Offline evaluation of explanation retrieval: LLM calls saved vs accuracy
+across similarity thresholds.
+
+Items are replayed in order against a fresh ExplanationIndex per
+threshold. A miss stands for an LLM call, and its explanation is added
+to the index. A hit saves the call and counts as correct when the
+retrieved explanation belongs to the same group as the item. Sentence-
+level types (STRUCTURAL_ERRORS) are never indexed by the service, so
+they always count as LLM calls.
+
+Items come either from a JSONL log ({"type", "text_span", "description",
+optional "group"}; group defaults to the description), or are synthesised
+from the corpus: every detected error span plus surface variants that
+need the same explanation (contractions, case, pronoun swaps, one-letter
+typos), grouped by the original span.
+
+Usage:
+    python bench/explain_index.py [corpus.txt] [--explanations log.jsonl]
+                                  [--thresholds 0.6,0.7,0.8,0.9,0.95]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from pipeline.analyze import (  # noqa: E402
+    STRUCTURAL_ERRORS,
+    analyze_sentence,
+    explanation_items,
+)
+from pipeline.explain_index import ExplanationIndex  # noqa: E402
+from pipeline.normalize import normalize_text  # noqa: E402
+from pipeline.segment import segment_sentences  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+_SWAPS = [
+    (r"\bdoes not\b", "doesn't"), (r"\bdoesn't\b", "does not"),
+    (r"\bdo not\b", "don't"), (r"\bdon't\b", "do not"),
+    (r"\bhe\b", "she"), (r"\bshe\b", "he"), (r"\bthey\b", "we"),
+]
+
+
+def variants(span: str, rng: random.Random) -> list[str]:
+    out = set()
+    for pattern, repl in _SWAPS:
+        v = re.sub(pattern, repl, span, flags=re.IGNORECASE)
+        if v != span:
+            out.add(v)
+    out.add(span.lower())
+    out.add(span[:1].upper() + span[1:])
+    words = span.split()
+    long_words = [i for i, w in enumerate(words) if len(w) > 4]
+    if long_words:
+        i = rng.choice(long_words)
+        j = rng.randrange(1, len(words[i]) - 1)
+        words[i] = words[i][:j] + words[i][j + 1:]
+        out.add(" ".join(words))
+    out.discard(span)
+    return sorted(out)
+
+
+def synthetic(corpus: str, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    with open(corpus, encoding="utf-8") as f:
+        sentences = [
+            s["text"] for line in f if line.strip()
+            for s in segment_sentences(normalize_text(line))
+        ]
+
+    items = []
+    seen = set()
+    for sent in sentences:
+        errors, _ = analyze_sentence(sent)
+        for item in explanation_items(sent, errors):
+            key = (item["type"], item["text_span"])
+            if key in seen:
+                continue
+            seen.add(key)
+            group = f"{item['type']}:{item['text_span']}"
+            for span in [item["text_span"]] + variants(item["text_span"], rng):
+                items.append({"type": item["type"], "text_span": span, "group": group})
+    rng.shuffle(items)
+    return items
+
+
+def from_log(path: str) -> list[dict]:
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                row.setdefault("group", " ".join(row["description"].lower().split()))
+                items.append(row)
+    return items
+
+
+def replay(items: list[dict], threshold: float) -> dict:
+    index = ExplanationIndex(threshold=threshold, max_per_type=len(items) or 1)
+    saved = correct = 0
+    for item in items:
+        if item["type"] in STRUCTURAL_ERRORS:
+            continue
+        hit = index.lookup(item["type"], item["text_span"])
+        if hit:
+            saved += 1
+            correct += hit["description"] == item["group"]
+        else:
+            # Description stands in for the LLM's answer: the group label
+            index.add(item["type"], item["text_span"], item["group"])
+    return {"saved": saved, "correct": correct}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--explanations")
+    parser.add_argument("--thresholds", default="0.5,0.6,0.7,0.8,0.9,0.95,0.99")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    items = from_log(args.explanations) if args.explanations else synthetic(args.corpus, args.seed)
+    groups = len({i["group"] for i in items})
+    print(f"{len(items)} items, {groups} groups (min LLM calls = {groups})")
+
+    print(f"{'threshold':>9} {'LLM calls':>10} {'saved':>7} {'saved %':>8} {'accuracy':>9}")
+    for t in [float(x) for x in args.thresholds.split(",")]:
+        r = replay(items, t)
+        accuracy = r["correct"] / r["saved"] if r["saved"] else 1.0
+        print(
+            f"{t:>9.2f} {len(items) - r['saved']:>10} {r['saved']:>7} "
+            f"{100 * r['saved'] / len(items):>7.1f}% {100 * accuracy:>8.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# bench/fake_llm.py
+"""
+Fake OpenAI-compatible chat server for load testing without network.
+
+Answers POST /v1/chat/completions with valid explanation JSON built from
+the items in the prompt, after a sampled latency (spread over the deltas
+when "stream": true). A configurable fraction
+of requests fail with 500 or are throttled with 429 + Retry-After.
+
+Usage:
+    python bench/fake_llm.py --port 8000 --latency lognormal:400,0.5 \
+        --error-rate 0.01 --rate-limit-rate 0.05
+
+Point the service at it with:
+    LLM_BACKEND=vllm VLLM_BASE_URL=http://localhost:8000/v1
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_latency(spec: str):
+    """
+    Latency distribution in milliseconds:
+      fixed:MS | uniform:LO,HI | normal:MEAN,STD | lognormal:MEDIAN,SIGMA | exp:MEAN
+    Returns a zero-argument sampler yielding seconds.
+    """
+
+    kind, _, args = spec.partition(":")
+    params = [float(p) for p in args.split(",") if p]
+
+    if kind == "fixed":
+        return lambda: params[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(params[0], params[1]) / 1000
+    if kind == "normal":
+        return lambda: max(0.0, random.gauss(params[0], params[1])) / 1000
+    if kind == "lognormal":
+        import math
+        mu = math.log(params[0])
+        return lambda: random.lognormvariate(mu, params[1]) / 1000
+    if kind == "exp":
+        return lambda: random.expovariate(1 / params[0]) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def extract_items(user_prompt: str) -> list[dict]:
+    """Best-effort: the last JSON array in the prompt is the item list
+    (dicts or compact [type, text_span] pairs)."""
+
+    pos = len(user_prompt)
+    while True:
+        pos = user_prompt.rfind("[", 0, pos)
+        if pos < 0:
+            return []
+        try:
+            items = json.loads(user_prompt[pos:])
+            if isinstance(items, list):
+                return [
+                    i if isinstance(i, dict) else {"type": i[0], "text_span": i[1]}
+                    for i in items
+                    if isinstance(i, dict) or (isinstance(i, list) and len(i) == 2)
+                ]
+        except ValueError:
+            pass
+
+
+def explanation_json(items: list[dict]) -> str:
+    return json.dumps({
+        "errors": [
+            {
+                "type": i.get("type", ""),
+                "text_span": i.get("text_span", ""),
+                "description": f"This span contains a {i.get('type', 'grammar')} problem.",
+            }
+            for i in items
+        ]
+    })
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    cfg = None  # argparse namespace, set in main()
+    stats = {"ok": 0, "error": 0, "throttled": 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: dict, headers: dict | None = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _count(self, key: str):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def _stream(self, content: str, model: str, latency: float):
+        """
+        SSE chat.completion.chunk stream: `latency` is spread evenly over
+        ~16-character deltas, like a model generating tokens.
+        """
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        chat_id = f"chatcmpl-{uuid.uuid4().hex}"
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+        delay = latency / len(pieces)
+
+        def write_event(payload):
+            data = f"data: {payload}\n\n".encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        for n, piece in enumerate(pieces):
+            time.sleep(delay)
+            write_event(json.dumps({
+                "id": chat_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": piece} if n == 0 else {"content": piece},
+                    "finish_reason": "stop" if n == len(pieces) - 1 else None,
+                }],
+            }))
+        write_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send(200, {"object": "list", "data": [{"id": self.cfg.model, "object": "model"}]})
+        elif self.path == "/stats":
+            self._send(200, self.stats)
+        else:
+            self._send(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+
+        roll = random.random()
+        if roll < self.cfg.rate_limit_rate:
+            self._count("throttled")
+            self._send(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                {"Retry-After": str(self.cfg.retry_after)},
+            )
+            return
+
+        latency = self.cfg.sample_latency()
+
+        if roll < self.cfg.rate_limit_rate + self.cfg.error_rate:
+            time.sleep(latency)
+            self._count("error")
+            self._send(500, {"error": {"message": "Injected failure", "type": "server_error"}})
+            return
+
+        messages = body.get("messages", [])
+        user_prompt = next(
+            (m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), ""
+        )
+        content = explanation_json(extract_items(user_prompt))
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        completion_tokens = len(content) // 4
+
+        self._count("ok")
+
+        if body.get("stream"):
+            self._stream(content, body.get("model", self.cfg.model), latency)
+            return
+
+        time.sleep(latency)
+        self._send(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", self.cfg.model),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", default="lognormal:400,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--model", default="fake-llm")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    args.sample_latency = parse_latency(args.latency)
+    Handler.cfg = args
+
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    print(f"fake LLM on http://{args.host}:{args.port}/v1 latency={args.latency} "
+          f"errors={args.error_rate} 429s={args.rate_limit_rate}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
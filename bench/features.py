@@ -0,0 +1,81 @@
+# bench/features.py
+"""
+Feature aggregation benchmark: per-token Python loops (the previous
+implementation of the refine_with_spacy / segment / clause-overload
+counts) vs batch_features over whole batches of parsed docs.
+Parsing is done once, outside the timings, and both results are checked
+for equality.
+
+Usage:
+    python bench/features.py [corpus.txt] [--batch 32,256] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from nlp import get_nlp  # noqa: E402
+from pipeline.features import batch_features, feature_row  # noqa: E402
+from pipeline.normalize import normalize_text  # noqa: E402
+from pipeline.segment import segment_sentences  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+
+def loop_features(doc) -> dict:
+    return {
+        "tokens": len(doc),
+        "verbs": sum(1 for t in doc if t.pos_ == "VERB"),
+        "verbs_aux": sum(1 for t in doc if t.pos_ in ("VERB", "AUX")),
+        "root_verbs": sum(1 for t in doc if t.dep_ == "ROOT" and t.pos_ in ("VERB", "AUX")),
+        "subjects": sum(1 for t in doc if t.dep_ in ("nsubj", "nsubjpass")),
+        "cc": sum(1 for t in doc if t.dep_ == "cc"),
+        "sent_punct": sum(1 for t in doc if t.text in {".", "!", "?"}),
+        "clause_words": sum(1 for t in doc if t.text.lower() in ("and", "but", "which", "that")),
+        "subordinators": sum(
+            1 for t in doc if t.text.lower() in ("while", "although", "because", "if", "when")
+        ),
+        "sent_starts": sum(1 for t in doc if t.is_sent_start),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--batch", default="32,256")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        sentences = [
+            s["text"]
+            for line in f if line.strip()
+            for s in segment_sentences(normalize_text(line))
+        ]
+
+    for size in [int(b) for b in args.batch.split(",")]:
+        texts = (sentences * (size // len(sentences) + 1))[:size]
+        docs = list(get_nlp().pipe(texts))
+
+        feats = batch_features(docs)
+        assert all(feature_row(feats, i) == loop_features(d) for i, d in enumerate(docs))
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            [loop_features(d) for d in docs]
+        loop_s = (time.perf_counter() - t0) / args.repeat
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            batch_features(docs)
+        numpy_s = (time.perf_counter() - t0) / args.repeat
+
+        print(f"batch {size:>5}: loops {loop_s * 1000:8.2f}ms  numpy {numpy_s * 1000:8.2f}ms "
+              f"({loop_s / numpy_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
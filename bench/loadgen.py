@@ -0,0 +1,116 @@
+# bench/loadgen.py
+"""
+Load generator for POST /evaluate.
+
+Sends summaries from a corpus at a target rate (open loop, --rps) or as fast
+as the concurrency cap allows (closed loop, --rps 0), then reports
+throughput, latency percentiles and errors by status.
+
+Usage:
+    python bench/loadgen.py --url http://localhost:8080 --concurrency 16 \
+        --rps 20 --duration 60 [corpus.txt]
+"""
+
+import argparse
+import asyncio
+import collections
+import itertools
+import os
+import time
+
+import httpx
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def run(args, corpus: list[str]) -> dict:
+    latencies = []
+    statuses = collections.Counter()
+    sem = asyncio.Semaphore(args.concurrency)
+    texts = itertools.cycle(corpus)
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+
+        async def one(text: str, scheduled: float | None = None):
+            # Open loop: latency runs from the scheduled arrival, so time
+            # queued behind `sem` / the connection pool is counted
+            t0 = scheduled if scheduled is not None else time.perf_counter()
+            async with sem:
+                try:
+                    r = await client.post("/evaluate", json={"summary": text})
+                    statuses[r.status_code] += 1
+                    if r.status_code == 200:
+                        latencies.append(time.perf_counter() - t0)
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+
+        start = time.perf_counter()
+        deadline = start + args.duration
+        tasks = []
+
+        if args.rps > 0:
+            # Open loop: fixed arrival schedule, independent of response times
+            interval = 1 / args.rps
+            next_at = start
+            while next_at < deadline:
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+                tasks.append(asyncio.create_task(one(next(texts), next_at)))
+                next_at += interval
+            await asyncio.gather(*tasks)
+        else:
+            # Closed loop: `concurrency` workers back to back
+            async def worker():
+                while time.perf_counter() < deadline:
+                    await one(next(texts))
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = sum(statuses.values())
+    ok = statuses.get(200, 0)
+    return {
+        "requests": total,
+        "elapsed_s": elapsed,
+        "throughput_rps": ok / elapsed if elapsed else 0.0,
+        "error_rate": (total - ok) / total if total else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "statuses": dict(statuses),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--url", default="http://localhost:8080")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=0.0, help="0 = closed loop")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = [line.strip() for line in f if line.strip()]
+
+    report = asyncio.run(run(args, corpus))
+
+    print(f"requests     {report['requests']} in {report['elapsed_s']:.1f}s")
+    print(f"throughput   {report['throughput_rps']:.2f} req/s (200 only)")
+    print(f"latency      p50={report['p50_ms']:.0f}ms p95={report['p95_ms']:.0f}ms "
+          f"p99={report['p99_ms']:.0f}ms")
+    print(f"error rate   {report['error_rate']:.2%}")
+    print(f"statuses     {report['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
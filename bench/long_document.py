@@ -0,0 +1,79 @@
+# bench/long_document.py
+"""
+Long-document benchmark: peak Python heap and wall time vs input size,
+standard (whole-document) analysis vs chunked streaming analysis.
+No LLM calls are made.
+
+Usage:
+    python bench/long_document.py [corpus.txt] [--words 1000,10000,50000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from pipeline.analyze import analyze_long_document, iter_analyzed  # noqa: E402
+from pipeline.grammar_score import score_grammar  # noqa: E402
+from pipeline.normalize import normalize_text  # noqa: E402
+from pipeline.segment import segment_sentences  # noqa: E402
+from pipeline.spelling import evaluate_spelling  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+
+def analyze_standard(summary: str) -> int:
+    normalized = normalize_text(summary)
+    sentences = segment_sentences(normalized)
+    results = [errors for _, errors, _ in iter_analyzed(sentences)]
+    evaluate_spelling(normalized)
+    return score_grammar(results, len(sentences))
+
+
+def build_document(corpus: list[str], words: int) -> str:
+    parts, count, i = [], 0, 0
+    while count < words:
+        line = corpus[i % len(corpus)]
+        parts.append(line)
+        count += len(line.split())
+        i += 1
+    return "\n".join(parts)
+
+
+def measure(fn, text: str) -> tuple[float, float]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn(text)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--words", default="1000,10000,50000")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = [line.strip() for line in f if line.strip()]
+
+    analyze_standard(corpus[0])  # warm-up / lazy load
+
+    print(f"{'words':>8} {'input MB':>9} | {'standard':>18} | {'streaming':>18}")
+    for words in [int(w) for w in args.words.split(",")]:
+        text = build_document(corpus, words)
+        std_t, std_mb = measure(analyze_standard, text)
+        str_t, str_mb = measure(analyze_long_document, text)
+        print(
+            f"{words:>8} {len(text) / 1e6:>9.2f} | "
+            f"{std_t:>7.2f}s {std_mb:>7.1f}MB | {str_t:>7.2f}s {str_mb:>7.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# bench/nlp_pool.py
+"""
+Parsing throughput per process: threads x model instances x batch size.
+
+Corpus sentences are parsed by T threads pulling batches of B sentences
+from a shared queue; each batch checks out one of I pooled instances
+(nlp.ModelPool), as requests / parse threads do in the service. Threads
+beyond the instance count wait for one. Any speedup of T > 1 over T = 1
+at the same I comes from thinc / the parser releasing the GIL, so the
+table shows which NLP_POOL_SIZE / NLP_PARSE_THREADS / ANALYZE_BATCH_SIZE
+suit a host (cores, BLAS threads, model size).
+
+Every configuration's parses (tag, dependency and head of each token)
+are also compared with a single-threaded parse on one instance; the last
+column says whether they are identical.
+
+Usage:
+    python bench/nlp_pool.py [corpus.txt] [--threads 1,2,4] [--instances 1,2,4]
+                             [--batch 1,8,32] [--sentences 2000]
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from nlp import ModelPool  # noqa: E402
+from pipeline.normalize import normalize_text  # noqa: E402
+from pipeline.segment import segment_sentences  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+
+def ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def fingerprint(doc) -> tuple:
+    return tuple((t.tag_, t.dep_, t.head.i) for t in doc)
+
+
+def run(
+    pool: ModelPool, sentences: list[str], threads: int, batch: int
+) -> tuple[float, list[tuple]]:
+    work = queue.Queue()
+    for i in range(0, len(sentences), batch):
+        work.put((i, sentences[i:i + batch]))
+    parsed = [None] * len(sentences)
+
+    def worker():
+        while True:
+            try:
+                start, texts = work.get_nowait()
+            except queue.Empty:
+                return
+            with pool.checkout() as nlp:
+                docs = list(nlp.pipe(texts, batch_size=batch))
+            parsed[start:start + len(docs)] = [fingerprint(d) for d in docs]
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return len(sentences) / (time.perf_counter() - start), parsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--threads", type=ints, default=[1, 2, 4])
+    parser.add_argument("--instances", type=ints, default=[1, 2, 4])
+    parser.add_argument("--batch", type=ints, default=[1, 8, 32])
+    parser.add_argument("--sentences", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        base = [
+            s["text"] for line in f if line.strip()
+            for s in segment_sentences(normalize_text(line))
+        ]
+    sentences = (base * (args.sentences // len(base) + 1))[:args.sentences]
+
+    print(f"{len(sentences)} sentences, {os.cpu_count()} CPUs")
+    reference = [fingerprint(d) for d in ModelPool(1).preload(1).instances[0].pipe(sentences)]
+
+    print(
+        f"{'instances':>9} {'threads':>7} {'batch':>5} {'sent/s':>9} "
+        f"{'vs 1 thread':>11} {'identical':>9}"
+    )
+
+    for instances in args.instances:
+        pool = ModelPool(instances).preload(instances)
+        run(pool, sentences[:50], 1, 8)  # warm-up
+        for batch in args.batch:
+            single = None
+            for threads in args.threads:
+                rate, parsed = run(pool, sentences, threads, batch)
+                single = single or rate
+                print(
+                    f"{instances:>9} {threads:>7} {batch:>5} {rate:>9.0f} "
+                    f"{rate / single:>10.2f}x {'yes' if parsed == reference else 'NO':>9}"
+                )
+
+
+if __name__ == "__main__":
+    main()
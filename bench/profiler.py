@@ -0,0 +1,124 @@
+# bench/profiler.py
+"""
+Sampling profiler overhead: pipeline throughput with the profiler off
+and at several sampling rates.
+
+T threads evaluate corpus summaries (normalize, segment, grammar rules,
+usage, score, spelling) for a fixed duration per setting. Reports
+summaries/second, the slowdown against the profiler-off run, the mean
+cost of one sample (stack walk of every thread), that cost per thread
+and the sampler's share of one core (cost x rate).
+
+A served worker has many more threads than the busy ones: the request
+threadpool (40 by default), explanation / LLM pools and the profiler
+itself, mostly parked in deep stacks. --idle-threads of them are
+simulated, blocked --idle-depth frames down, so the sample cost is that
+of a realistic worker; the cost scales with the thread count. The sampler holds the GIL while it walks stacks, so that
+share bounds the slowdown; on shared or single-core hosts the docs/s
+noise is larger than the effect, use --duration to tighten it.
+
+Usage:
+    python bench/profiler.py [corpus.txt] [--hz 0,19,49,99,499] [--threads 4]
+                             [--idle-threads 40] [--idle-depth 30] [--duration 10]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from pipeline.analyze import iter_analyzed  # noqa: E402
+from pipeline.grammar_score import score_grammar  # noqa: E402
+from pipeline.normalize import normalize_text  # noqa: E402
+from pipeline.segment import segment_sentences  # noqa: E402
+from pipeline.spelling import evaluate_spelling  # noqa: E402
+from profiler import SamplingProfiler  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+
+def evaluate(summary: str) -> None:
+    normalized = normalize_text(summary)
+    sentences = segment_sentences(normalized)
+    results = [errors for _, errors, _ in iter_analyzed(sentences)]
+    score_grammar(results, len(sentences))
+    evaluate_spelling(normalized)
+
+
+def park(depth: int, release: threading.Event) -> None:
+    if depth > 1:
+        park(depth - 1, release)
+    else:
+        release.wait()
+
+
+def throughput(lines: list[str], threads: int, duration: float) -> float:
+    done = [0] * threads
+    stop = time.monotonic() + duration
+
+    def worker(n):
+        i = n
+        while time.monotonic() < stop:
+            evaluate(lines[i % len(lines)])
+            done[n] += 1
+            i += threads
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(done) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--hz", default="0,19,49,99,499")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--idle-threads", type=int, default=40)
+    parser.add_argument("--idle-depth", type=int, default=30)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    release = threading.Event()
+    for _ in range(args.idle_threads):
+        threading.Thread(target=park, args=(args.idle_depth, release), daemon=True).start()
+
+    throughput(lines, args.threads, args.duration)  # warm-up: model load, caches
+
+    # Sampled threads: idle + busy workers + main (+ the sampler, which skips itself)
+    sampled = args.idle_threads + args.threads + 1
+    print(f"{sampled} threads sampled")
+    print(
+        f"{'hz':>5} {'docs/s':>8} {'slowdown':>9} {'sample us':>10} "
+        f"{'us/thread':>10} {'core share':>11}"
+    )
+    baseline = None
+    for hz in [float(h) for h in args.hz.split(",")]:
+        profiler = SamplingProfiler(hz, window_s=600, bucket_s=10, max_depth=64)
+        profiler.start()
+        rate = throughput(lines, args.threads, args.duration)
+        profiler.stop()
+        snap = profiler.snapshot()
+
+        baseline = baseline or rate
+        mean_us = snap["mean_sample_us"]
+        sample_us = f"{mean_us:.0f}" if mean_us else "-"
+        per_thread = f"{mean_us / sampled:.1f}" if mean_us else "-"
+        share = f"{100 * snap['overhead']:.2f}%" if snap["overhead"] else "-"
+        print(
+            f"{hz:>5.0f} {rate:>8.1f} {100 * (1 - rate / baseline):>8.1f}% "
+            f"{sample_us:>10} {per_thread:>10} {share:>11}"
+        )
+    release.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bench/prompt_tokens.py
+"""
+Explanation prompt size: legacy prompt (whole summary + indent=2 JSON of
+every item) vs build_explanation_prompt, in estimated tokens per document.
+No LLM calls are made.
+
+Usage:
+    python bench/prompt_tokens.py [corpus.txt]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from pipeline.analyze import explanation_items, iter_analyzed  # noqa: E402
+from pipeline.explain_prompt import build_explanation_prompt  # noqa: E402
+from pipeline.normalize import normalize_text  # noqa: E402
+from pipeline.segment import segment_sentences  # noqa: E402
+from utils.text import estimate_tokens  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+# The system prompt is identical in both versions; only the user
+# prompt is compared.
+SYSTEM_PROMPT = ""
+
+
+def legacy_prompt(summary: str, items: list[dict]) -> str:
+    return f"""
+Student summary:
+{summary}
+
+Explain the following grammar errors.
+You MUST keep the error type unchanged.
+
+Errors to explain:
+{json.dumps([{"type": i["type"], "text_span": i["text_span"]} for i in items], indent=2)}
+""".strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = [normalize_text(line) for line in f if line.strip()]
+
+    totals = {"legacy": 0, "built": 0, "items": 0, "sent": 0, "dropped": 0}
+
+    for summary in corpus:
+        items, sentences = [], []
+        for text, errors, _ in iter_analyzed(segment_sentences(summary)):
+            sent_items = explanation_items(text, errors)
+            if sent_items:
+                items.extend(sent_items)
+                sentences.append(text)
+        if not items:
+            continue
+
+        built = build_explanation_prompt(SYSTEM_PROMPT, items, sentences)
+        totals["legacy"] += estimate_tokens(legacy_prompt(summary, items))
+        totals["built"] += estimate_tokens(built["prompt"])
+        totals["items"] += len(items)
+        totals["sent"] += len(built["items"])
+        totals["dropped"] += built["dropped"]
+
+    saved = 1 - totals["built"] / totals["legacy"] if totals["legacy"] else 0.0
+    print(f"documents        {len(corpus)}")
+    print(f"items            {totals['items']} raw -> {totals['sent']} sent "
+          f"({totals['dropped']} over budget)")
+    print(f"prompt tokens    {totals['legacy']} legacy -> {totals['built']} built "
+          f"({saved:.1%} saved)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# bench/segment.py
+"""
+Segmentation benchmark: boundary accuracy and latency per mode.
+
+The parser-based boundaries (current behaviour) are the reference; each
+lightweight mode is scored by sentence-boundary precision / recall / F1
+and by the end-to-end latency of `segment_sentences`.
+
+Usage:
+    python bench/segment.py [corpus.txt] [--repeat N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from nlp import get_segmenter  # noqa: E402
+from pipeline.normalize import normalize_text  # noqa: E402
+from pipeline.segment import segment_sentences  # noqa: E402
+
+MODES = ["parser", "senter", "sentencizer"]
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+
+def load_corpus(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        return [normalize_text(line) for line in f if line.strip()]
+
+
+def boundaries(text: str, mode: str) -> set[int]:
+    """Character offsets at which a sentence (other than the first) starts."""
+    doc = get_segmenter(mode)(text)
+    return {sent.start_char for sent in doc.sents if sent.start_char > 0}
+
+
+def compare(corpus: list[str], mode: str) -> dict:
+    tp = fp = fn = 0
+    same_output = 0
+    for text in corpus:
+        ref = boundaries(text, "parser")
+        hyp = boundaries(text, mode)
+        tp += len(ref & hyp)
+        fp += len(hyp - ref)
+        fn += len(ref - hyp)
+        if segment_sentences(text, mode) == segment_sentences(text, "parser"):
+            same_output += 1
+
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = (
+        2 * precision * recall / (precision + recall)
+        if precision + recall else 0.0
+    )
+    return {
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "identical_segments": same_output / len(corpus),
+    }
+
+
+def latency(corpus: list[str], mode: str, repeat: int) -> dict:
+    segment_sentences(corpus[0], mode)  # warm-up / lazy load
+    samples = []
+    for _ in range(repeat):
+        for text in corpus:
+            t0 = time.perf_counter()
+            segment_sentences(text, mode)
+            samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    print(f"{len(corpus)} documents, {args.repeat} repeats\n")
+    print(f"{'mode':<12} {'P':>6} {'R':>6} {'F1':>6} {'same':>6} "
+          f"{'mean':>8} {'p50':>8} {'p95':>8}")
+
+    for mode in MODES:
+        acc = compare(corpus, mode)
+        lat = latency(corpus, mode, args.repeat)
+        print(
+            f"{mode:<12} {acc['precision']:>6.3f} {acc['recall']:>6.3f} "
+            f"{acc['f1']:>6.3f} {acc['identical_segments']:>6.1%} "
+            f"{lat['mean_ms']:>7.2f}ms {lat['p50_ms']:>7.2f}ms "
+            f"{lat['p95_ms']:>7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
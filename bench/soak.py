@@ -0,0 +1,108 @@
+# bench/soak.py
+"""
+Memory soak: typo-heavy submissions through the pipeline, with and
+without the MemoryGuard model reloads.
+
+Each synthetic submission is a corpus summary with a share of its words
+mangled (random edits plus never-seen tokens), so almost every request
+adds new strings to the spaCy StringStore. Reports RSS, StringStore size
+and reload count as the run progresses; with reloads on, both should
+level off instead of growing with the number of submissions.
+
+Usage:
+    python bench/soak.py [corpus.txt] [--n 1000000] [--typo-rate 0.3]
+                         [--max-strings 300000] [--no-reload]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from memory import MemoryGuard, rss_mb  # noqa: E402
+from nlp import string_store_sizes  # noqa: E402
+from pipeline.analyze import analyze_batch  # noqa: E402
+from pipeline.grammar_score import score_grammar  # noqa: E402
+from pipeline.normalize import normalize_text  # noqa: E402
+from pipeline.segment import segment_sentences  # noqa: E402
+from pipeline.spelling import evaluate_spelling  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+
+def mangle(word: str, rng: random.Random) -> str:
+    if len(word) < 3 or rng.random() < 0.3:
+        # Never-seen token
+        return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+    i = rng.randrange(len(word))
+    op = rng.randrange(3)
+    if op == 0:
+        return word[:i] + word[i + 1:]
+    if op == 1:
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def submissions(lines: list[str], typo_rate: float, seed: int):
+    rng = random.Random(seed)
+    while True:
+        words = rng.choice(lines).split()
+        yield " ".join(
+            mangle(w, rng) if rng.random() < typo_rate else w for w in words
+        )
+
+
+def evaluate(summary: str) -> None:
+    normalized = normalize_text(summary)
+    sentences = segment_sentences(normalized)
+    results = analyze_batch([s["text"] for s in sentences])
+    score_grammar([errors for errors, _ in results], len(sentences))
+    evaluate_spelling(normalized)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--typo-rate", type=float, default=0.3)
+    parser.add_argument("--max-strings", type=int, default=300_000)
+    parser.add_argument("--check-every", type=int, default=200)
+    parser.add_argument("--report-every", type=int, default=10_000)
+    parser.add_argument("--no-reload", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    guard = MemoryGuard(
+        args.check_every,
+        0 if args.no_reload else args.max_strings,
+        recycle_requests=0,
+        recycle_rss_mb=0,
+    )
+
+    print(f"{'requests':>10} {'rss MB':>8} {'strings':>9} {'lexemes':>9} {'reloads':>8} {'req/s':>7}")
+    start = time.perf_counter()
+    for i, summary in enumerate(submissions(lines, args.typo_rate, args.seed), 1):
+        evaluate(summary)
+        guard.after_request()
+
+        if i % args.report_every == 0 or i == args.n:
+            sizes = string_store_sizes().get("parser", {})
+            elapsed = time.perf_counter() - start
+            print(
+                f"{i:>10} {rss_mb():>8.1f} {sizes.get('strings', 0):>9} "
+                f"{sizes.get('lexemes', 0):>9} {guard.reloads:>8} {i / elapsed:>7.0f}",
+                flush=True,
+            )
+        if i == args.n:
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# bench/spelling.py
+"""
+Spelling on a cohort: per-document lookups vs the cached single-document
+path vs `evaluate_spelling_batch`.
+
+The cohort imitates N students summarising the same passage: each
+submission is a shuffled pick of corpus sentences with a share of its
+words mistyped, so most vocabulary is shared across the cohort and the
+typos mostly aren't. Checks that all three paths give identical results
+and reports documents/second.
+
+Usage:
+    python bench/spelling.py [corpus.txt] [--docs 5000] [--typo-rate 0.05]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from pipeline import spelling  # noqa: E402
+from pipeline.normalize import normalize_text  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "corpus.txt")
+
+
+def cohort(lines: list[str], docs: int, typo_rate: float, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    sentences = [s.strip() + "." for line in lines for s in line.split(".") if s.strip()]
+    out = []
+    for _ in range(docs):
+        words = " ".join(rng.sample(sentences, k=min(4, len(sentences)))).split()
+        for i, w in enumerate(words):
+            if len(w) > 3 and rng.random() < typo_rate:
+                j = rng.randrange(len(w))
+                words[i] = w[:j] + rng.choice(string.ascii_lowercase) + w[j + 1:]
+        out.append(normalize_text(" ".join(words)))
+    return out
+
+
+def uncached(text: str) -> dict:
+    # Pre-batch implementation: one `unknown` call over every token
+    words = spelling._tokenize(text)
+    return spelling._result(len(words), spelling._spell.unknown(words))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--typo-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    texts = cohort(lines, args.docs, args.typo_rate, args.seed)
+
+    tokens = sum(len(spelling._tokenize(t)) for t in texts)
+    distinct = len({w for t in texts for w in spelling._tokenize(t)})
+    print(f"{len(texts)} docs, {tokens} tokens, {distinct} distinct words")
+
+    base, t_base = timed(lambda: [uncached(t) for t in texts])
+    spelling._is_misspelled.cache_clear()
+    cold, t_cold = timed(lambda: [spelling.evaluate_spelling(t) for t in texts])
+    warm, t_warm = timed(lambda: [spelling.evaluate_spelling(t) for t in texts])
+    batch, t_batch = timed(lambda: spelling.evaluate_spelling_batch(texts))
+
+    assert base == cold == warm == batch, "spelling results differ"
+
+    print(f"{'path':<26} {'seconds':>8} {'docs/s':>9} {'speedup':>8}")
+    for name, t in [
+        ("per-document (uncached)", t_base),
+        ("single-doc, LRU cold", t_cold),
+        ("single-doc, LRU warm", t_warm),
+        ("evaluate_spelling_batch", t_batch),
+    ]:
+        print(f"{name:<26} {t:>8.3f} {len(texts) / t:>9.0f} {t_base / t:>7.1f}x")
+    print(f"LRU: {spelling._is_misspelled.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The app imports its modules top-level (`from config import ...`)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+# grammar_llm builds its client at import; the tests replace it, so any
+# backend that needs no probe or key will do
+os.environ.setdefault("LLM_BACKEND", "vllm")
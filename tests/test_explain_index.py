@@ -0,0 +1,28 @@
+from pipeline.explain_index import ExplanationIndex
+
+
+def test_lookup_matches_near_duplicate_span():
+    index = ExplanationIndex(threshold=0.5)
+    index.add("aux_verb_error", "doesn't has", "Use the base form after does.")
+
+    hit = index.lookup("aux_verb_error", "does not has")
+
+    assert hit is not None
+    assert hit["description"] == "Use the base form after does."
+
+
+def test_zero_capacity_stores_nothing():
+    index = ExplanationIndex(threshold=0.5, max_per_type=0)
+    index.add("aux_verb_error", "doesn't has", "Use the base form after does.")
+
+    assert index.lookup("aux_verb_error", "doesn't has") is None
+    assert index.snapshot()["sizes"] == {}
+
+
+def test_capacity_evicts_oldest():
+    index = ExplanationIndex(threshold=0.99, max_per_type=1)
+    index.add("article_error", "apple", "first")
+    index.add("article_error", "banana", "second")
+
+    assert index.lookup("article_error", "apple") is None
+    assert index.lookup("article_error", "banana")["description"] == "second"
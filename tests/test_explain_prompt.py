@@ -0,0 +1,27 @@
+from pipeline.explain_prompt import build_explanation_prompt
+
+SENTENCES = [
+    "The author explain that the grid is not ready.",
+    "the article says storage is the missing piece.",
+]
+
+
+def test_short_span_uses_its_own_sentence_as_context():
+    items = [
+        {"type": "agreement_error", "text_span": "explain", "sentence": SENTENCES[0]},
+        {"type": "capitalization_error", "text_span": "the", "sentence": SENTENCES[1]},
+    ]
+
+    prompt = build_explanation_prompt("system", items, SENTENCES)["prompt"]
+
+    assert f"- {SENTENCES[0]}" in prompt
+    assert f"- {SENTENCES[1]}" in prompt
+
+
+def test_items_without_sentence_fall_back_to_substring_search():
+    items = [{"type": "agreement_error", "text_span": "explain"}]
+
+    prompt = build_explanation_prompt("system", items, SENTENCES)["prompt"]
+
+    assert f"- {SENTENCES[0]}" in prompt
+    assert SENTENCES[1] not in prompt
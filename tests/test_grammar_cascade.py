@@ -0,0 +1,24 @@
+import pytest
+
+from pipeline.analyze import analyze_batch
+from pipeline.grammar_cascade import screen_sentence
+
+# Sentences the cheap tier used to skip although the full rules can flag them
+SENTENCES = [
+    "There are many benefits.",
+    "There is a problem with the grid.",
+    "Which was the reason for the delay.",
+    "Who is responsible for the policy.",
+    "To finish the report, needing more data is common.",
+    "To meet the target, requiring more staff was the plan.",
+]
+
+
+@pytest.mark.parametrize("sentence", SENTENCES)
+def test_cascade_matches_full_pipeline(sentence):
+    assert analyze_batch([sentence], cascade=True) == analyze_batch([sentence], cascade=False)
+
+
+@pytest.mark.parametrize("sentence", SENTENCES[4:])
+def test_usage_screen_covers_every_inflection(sentence):
+    assert screen_sentence(sentence)["usage"]
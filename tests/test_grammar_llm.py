@@ -0,0 +1,35 @@
+import json
+
+from pipeline import grammar_llm
+from pipeline.explain_index import ExplanationIndex
+
+ITEMS = [
+    {"type": "aux_verb_error", "text_span": "did went", "sentence": "He did went home."},
+    {"type": "article_error", "text_span": "apple", "sentence": "She ate apple."},
+    {"type": "tense_error", "text_span": "goes", "sentence": "Yesterday he goes out."},
+]
+
+
+class _FakeLLM:
+    def complete(self, system, prompt, timeout=None):
+        errors = [
+            {"type": i["type"], "text_span": i["text_span"], "description": "llm"}
+            for i in ITEMS if f'"{i["text_span"]}"' in prompt
+        ]
+        return json.dumps({"errors": list(reversed(errors))}), {}
+
+
+def test_retrieved_and_generated_explanations_keep_item_order(monkeypatch):
+    index = ExplanationIndex(threshold=0.99)
+    index.add("article_error", "apple", "stored")
+    monkeypatch.setattr(grammar_llm, "EXPLAIN_INDEX", True)
+    monkeypatch.setattr(grammar_llm, "explanation_index", index)
+    monkeypatch.setattr(grammar_llm, "_llm", _FakeLLM())
+
+    result = grammar_llm.explain_grammar_errors(
+        "", {"_items": ITEMS, "_sentences": [i["sentence"] for i in ITEMS]}
+    )
+
+    assert [e["text_span"] for e in result["errors"]] == ["did went", "apple", "goes"]
+    assert result["errors"][1]["description"] == "stored"
+    assert result["usage"]["items_retrieved"] == 1